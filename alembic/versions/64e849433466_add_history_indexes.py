@@ -0,0 +1,40 @@
+"""add history indexes
+
+Revision ID: 64e849433466
+Revises: 5027530bdce1
+Create Date: 2026-10-18 10:12:41.118523
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "64e849433466"
+down_revision: Union[str, Sequence[str], None] = "5027530bdce1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_threads_user_created",
+        "threads",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "idx_messages_thread_created",
+        "messages",
+        ["thread_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_messages_thread_created", table_name="messages")
+    op.drop_index("idx_threads_user_created", table_name="threads")
@@ -0,0 +1,33 @@
+"""add thread summary
+
+Revision ID: 9b2d41f7c6a3
+Revises: 3e891c37c28e
+Create Date: 2026-10-18 21:05:33.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b2d41f7c6a3"
+down_revision: Union[str, Sequence[str], None] = "3e891c37c28e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("threads", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column(
+        "threads", sa.Column("summary_updated_at", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("threads", "summary_updated_at")
+    op.drop_column("threads", "summary")
@@ -0,0 +1,28 @@
+"""unique file path
+
+Revision ID: e1a6b3c08d27
+Revises: c4e7a2d91f05
+Create Date: 2026-10-18 23:58:04.517392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a6b3c08d27"
+down_revision: Union[str, Sequence[str], None] = "c4e7a2d91f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("uq_files_file_path", "Files", ["file_path"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_files_file_path", table_name="Files")
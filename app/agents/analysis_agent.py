@@ -1,7 +1,7 @@
-from langgraph.graph import MessagesState
+from app.agents.state import AgentState
 
 
-def analysis_agent(state: MessagesState):
+def analysis_agent(state: AgentState):
     return {
         "messages": [
             {
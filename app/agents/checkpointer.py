@@ -0,0 +1,45 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.config import settings
+from app.core.database import DATABASE_URL
+from app.core.registry import registry
+
+_checkpointer: Optional[AsyncPostgresSaver] = None
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[AsyncPostgresSaver]:
+    """
+    Open the Postgres checkpointer used to persist graph state per thread.
+
+    The saver runs on its own psycopg connection pool and creates its tables
+    on first use. While the context is open, ``get_checkpointer`` returns it.
+    """
+    global _checkpointer
+
+    async with AsyncConnectionPool(
+        conninfo=DATABASE_URL,
+        min_size=1,
+        max_size=settings.CHECKPOINT_POOL_SIZE,
+        open=False,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+    ) as pool:
+        saver = AsyncPostgresSaver(pool)
+        await saver.setup()
+        _checkpointer = saver
+        registry.reset("chat_graph")
+        try:
+            yield saver
+        finally:
+            _checkpointer = None
+            registry.reset("chat_graph")
+
+
+def get_checkpointer() -> Optional[AsyncPostgresSaver]:
+    """Return the open checkpointer, or ``None`` when running without one."""
+    return _checkpointer
@@ -1,13 +1,54 @@
-from langgraph.graph import MessagesState
+from langchain_core.messages import HumanMessage
 
+from app.agents.state import AgentState
+from app.core.logger import logger
+from app.services.retrieval_service import retrieval_service, split_queries
+
+
+def _user_message(state: AgentState) -> str:
+    for message in reversed(state["messages"]):
+        if isinstance(message, HumanMessage):
+            return message.content
+    return ""
+
+
+async def data_agent(state: AgentState):
+    user_id = state.get("user_id")
+    if user_id is None:
+        return {
+            "messages": [
+                {
+                    "role": "ai",
+                    "content": "DataAgent: No user was given, so there are no documents to search.",
+                }
+            ],
+            "result": "No documents searched",
+        }
+
+    queries = split_queries(_user_message(state))
+    try:
+        hits = await retrieval_service.search(queries, user_id)
+    except Exception as e:
+        # Qdrant or the embedder is down; answer without documents
+        logger.error(f"Document search failed: {str(e)}", extra={"user_id": user_id}, exc_info=True)
+        return {
+            "messages": [
+                {
+                    "role": "ai",
+                    "content": "DataAgent: Your documents could not be searched right now.",
+                }
+            ],
+            "result": "Document search failed",
+        }
+    if not hits:
+        content = "DataAgent: No matching passages were found in your documents."
+    else:
+        passages = "\n".join(
+            f"[{hit['source']} p.{hit['page']}] {hit['text']}" for hit in hits
+        )
+        content = f"DataAgent: Found {len(hits)} relevant passages.\n{passages}"
 
-def data_agent(state: MessagesState):
     return {
-        "messages": [
-            {
-                "role": "ai",
-                "content": "DataAgent: Fetched and processed the required data.",
-            }
-        ],
-        "result": "Data fetched successfully",
+        "messages": [{"role": "ai", "content": content}],
+        "result": f"Retrieved {len(hits)} passages for {len(queries)} queries",
     }
@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Optional
+
+from app.agents.routing import Intent
+from app.agents.state import AgentState
+from app.core.config import settings
+from app.core.logger import logger
+
+
+def branch(intent: Intent, action: Callable, timeout: Optional[float] = None) -> Callable:
+    """
+    Wrap a worker agent so it can run as one branch of a parallel fan-out.
+
+    Concurrent branches cannot all write the single ``result`` channel, so the
+    worker's ``result`` is moved into ``results[intent.name]`` together with
+    its reply. A branch that does not finish within ``timeout`` seconds
+    (``intent.timeout``, then ``BRANCH_TIMEOUT``) is abandoned and reported as
+    timed out instead of holding back the other branches.
+
+    Args:
+        intent: Intent the branch handles.
+        action: Worker node function, sync or async.
+        timeout: Seconds to wait for the branch; overrides the intent's value.
+
+    Returns:
+        An async node function.
+    """
+    limit = timeout or intent.timeout or settings.BRANCH_TIMEOUT
+
+    async def run(state: AgentState) -> Dict[str, Any]:
+        if inspect.iscoroutinefunction(action):
+            pending = action(state)
+        else:
+            pending = asyncio.to_thread(action, state)
+        try:
+            update = await asyncio.wait_for(pending, timeout=limit)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Agent branch timed out",
+                extra={"intent": intent.name, "timeout": limit},
+            )
+            content = f"{intent.agent}: No answer within {limit:g}s."
+            return {
+                "messages": [{"role": "ai", "content": content}],
+                "results": {
+                    intent.name: {"status": "timeout", "result": None, "content": content}
+                },
+            }
+
+        update = dict(update or {})
+        messages = update.get("messages") or []
+        last = messages[-1] if messages else None
+        content = last.get("content") if isinstance(last, dict) else getattr(last, "content", None)
+        update["results"] = {
+            intent.name: {
+                "status": "ok",
+                "result": update.pop("result", None),
+                "content": content,
+            }
+        }
+        return update
+
+    run.__name__ = getattr(action, "__name__", intent.target)
+    run.__wrapped__ = action
+    return run
+
+
+def join_results(state: AgentState):
+    """
+    Merge the branches of this turn in routing priority order.
+
+    ``result`` gets the combined outcome. With several branches, or when one
+    timed out, their replies are merged into a single message so
+    ``response_agent`` answers from all of them rather than whichever branch
+    finished last.
+    """
+    results = state.get("results") or {}
+    turn = [results[name] for name in state.get("intents") or [] if name in results]
+    if not turn:
+        return None
+
+    update = {
+        "result": "\n".join(entry["result"] or entry["status"] for entry in turn),
+    }
+    if len(turn) > 1 or any(entry["status"] != "ok" for entry in turn):
+        update["messages"] = [
+            {
+                "role": "ai",
+                "content": "\n".join(entry["content"] or "" for entry in turn),
+            }
+        ]
+    return update
@@ -1,34 +1,65 @@
-from langgraph.graph import StateGraph, START, END, MessagesState
+from langgraph.graph import START, END
+from app.agents.instrumentation import InstrumentedStateGraph
+from app.agents.state import AgentState
+from app.agents.checkpointer import get_checkpointer
+from app.agents.history import compact_history
 from app.agents.query_agent import query_agent
+from app.agents.routing import intent_router
+from app.agents.fanout import branch, join_results
 from app.agents.data_agent import data_agent
 from app.agents.response_agent import response_agent
 from app.agents.analysis_agent import analysis_agent
 
-graph = StateGraph(MessagesState)
+# Every node added here is timed and exported on /metrics
+graph = InstrumentedStateGraph(AgentState, metrics_name="chat")
 
 # Add nodes
+# LLM-backed nodes must be `async def` and call models through
+# `app.agents.llm.ainvoke_llm`, which shares the per-process concurrency limit
+# and applies timeouts, retries and the input token budget. Never call the
+# blocking `llm.invoke` here. Build prompts with `history.with_summary(state)`
+# so earlier, compacted turns are still represented.
+graph.add_node("compact_history", compact_history)
 graph.add_node("query_agent", query_agent)
-graph.add_node("data_agent", data_agent)
-graph.add_node("analysis_agent", analysis_agent)
+graph.add_node("data_agent", branch(intent_router.get("data"), data_agent))
+graph.add_node("analysis_agent", branch(intent_router.get("analysis"), analysis_agent))
+graph.add_node("join_results", join_results)
 graph.add_node("response_agent", response_agent)
 
 # Define the flow
-graph.add_edge(START, "query_agent")  # Start with query_agent
+graph.add_edge(START, "compact_history")  # Compact carried-over history first
+graph.add_edge("compact_history", "query_agent")
 
-# Conditional edges from query_agent
+
+def route_intents(state: AgentState):
+    """Fan out to the agent of every detected intent; they run concurrently."""
+    targets = intent_router.targets()
+    nodes = [targets[name] for name in state.get("intents") or [] if name in targets]
+    return nodes or "response_agent"
+
+
+# Conditional edges from query_agent, one per intent in the routing table
 graph.add_conditional_edges(
     "query_agent",
-    lambda state: state.get("decision"),
-    {"data": "data_agent", "analysis": "analysis_agent", "unknown": "response_agent"},
+    route_intents,
+    [*intent_router.targets().values(), "response_agent"],
 )
 
-# Connect data_agent and analysis_agent to response_agent
-graph.add_edge("data_agent", "response_agent")
-graph.add_edge("analysis_agent", "response_agent")
+# Branches started together finish in the same step, so join_results runs
+# once with all of them before response_agent
+for target in intent_router.targets().values():
+    graph.add_edge(target, "join_results")
+graph.add_edge("join_results", "response_agent")
 
 # End the flow after response_agent
 graph.add_edge("response_agent", END)
 
-# Compile the graph
-compiled_graph = graph.compile()
-graph_agent = compiled_graph
+
+def build_graph_agent():
+    """Compile the chat graph, bound to the Postgres checkpointer when open.
+
+    Registered as the ``chat_graph`` component, which is the only place the
+    graph is compiled; use ``registry.get("chat_graph")``. The registry entry
+    is reset whenever the checkpointer is opened or closed.
+    """
+    return graph.compile(checkpointer=get_checkpointer())
@@ -0,0 +1,134 @@
+from typing import List, Optional
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+from langchain_core.messages.utils import trim_messages
+from langchain_openai import ChatOpenAI
+
+from app.agents.llm import ainvoke_llm
+from app.agents.state import AgentState
+from app.agents.tokens import aload_encoding, token_counter, truncate_text
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.registry import registry
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the running summary of a conversation between a user and an "
+    "assistant. Merge the new messages into the current summary. Keep facts, "
+    "names, numbers, decisions and open questions; drop greetings and "
+    f"repetition. Answer with the updated summary only, in at most "
+    f"{settings.HISTORY_SUMMARY_MAX_TOKENS} tokens."
+)
+
+
+def create_summary_llm():
+    return ChatOpenAI(
+        model_name=settings.SUMMARY_LLM_MODEL,
+        temperature=0,
+        api_key=settings.OPENAI_API_KEY,
+        max_retries=0,  # retries are handled by ainvoke_llm
+    )
+
+
+def with_summary(state: AgentState) -> List[BaseMessage]:
+    """Messages to send to an LLM: the running summary, then the recent turns."""
+    summary = state.get("summary")
+    if not summary:
+        return list(state["messages"])
+    return [
+        SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"),
+        *state["messages"],
+    ]
+
+
+def _transcript(messages: List[BaseMessage]) -> str:
+    roles = {HumanMessage: "User", AIMessage: "Assistant"}
+    return "\n".join(
+        f"{roles.get(type(message), message.type)}: {message.text}" for message in messages
+    )
+
+
+async def summarize(previous: Optional[str], folded: List[BaseMessage]) -> str:
+    """
+    Fold ``folded`` messages into the running summary.
+
+    Uses the ``summary_llm`` component when ``HISTORY_SUMMARIZE`` is on. If
+    that is off or the call fails, the transcript is appended instead and the
+    oldest text is cut, so the turn still completes. Either way the result
+    is capped at ``HISTORY_SUMMARY_MAX_TOKENS``.
+    """
+    transcript = _transcript(folded)
+    if settings.HISTORY_SUMMARIZE:
+        try:
+            reply = await ainvoke_llm(
+                registry.get("summary_llm"),
+                [
+                    SystemMessage(content=SUMMARY_INSTRUCTIONS),
+                    HumanMessage(
+                        content=f"Current summary:\n{previous or '(none)'}\n\n"
+                        f"New messages:\n{transcript}"
+                    ),
+                ],
+            )
+            return truncate_text(
+                reply.text.strip(),
+                settings.HISTORY_SUMMARY_MAX_TOKENS,
+                settings.SUMMARY_LLM_MODEL,
+                keep="first",
+            )
+        except Exception as e:
+            logger.warning(f"History summarization failed, keeping transcript: {str(e)}")
+
+    combined = f"{previous}\n{transcript}" if previous else transcript
+    return truncate_text(combined, settings.HISTORY_SUMMARY_MAX_TOKENS, settings.SUMMARY_LLM_MODEL)
+
+
+async def compact_history(state: AgentState):
+    """
+    Keep recent turns verbatim and fold older ones into a running summary.
+
+    Runs at the start of every turn. Once a thread holds
+    ``HISTORY_KEEP_TURNS + HISTORY_COMPACT_EVERY`` turns, or its messages go
+    over ``HISTORY_MAX_MESSAGES`` or ``HISTORY_MAX_TOKENS``, everything but
+    the last ``HISTORY_KEEP_TURNS`` turns (cut further to fit those limits) is
+    summarized into ``summary`` and removed from the state. Compacting in
+    steps of several turns means the summarizer runs every few turns rather
+    than on every one. The checkpoint therefore stays bounded however long
+    the thread grows, and the newest message is always kept.
+    """
+    messages = state["messages"]
+    await aload_encoding(settings.SUMMARY_LLM_MODEL)
+    counter = token_counter(settings.SUMMARY_LLM_MODEL)
+    turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+    if (
+        len(turn_starts) < settings.HISTORY_KEEP_TURNS + settings.HISTORY_COMPACT_EVERY
+        and len(messages) <= settings.HISTORY_MAX_MESSAGES
+        and counter(messages) <= settings.HISTORY_MAX_TOKENS
+    ):
+        return None
+
+    start = turn_starts[-settings.HISTORY_KEEP_TURNS] if len(turn_starts) >= settings.HISTORY_KEEP_TURNS else 0
+    recent = messages[start:][-settings.HISTORY_MAX_MESSAGES:]
+    kept = trim_messages(
+        recent,
+        max_tokens=settings.HISTORY_MAX_TOKENS,
+        token_counter=counter,
+        strategy="last",
+        start_on="human",
+    ) or [messages[-1]]
+
+    kept_ids = {message.id for message in kept}
+    folded = [message for message in messages if message.id not in kept_ids]
+    if not folded:
+        return None
+
+    return {
+        "messages": [RemoveMessage(id=message.id) for message in folded],
+        "summary": await summarize(state.get("summary"), folded),
+    }
@@ -0,0 +1,57 @@
+import functools
+import inspect
+import time
+from typing import Any, Callable
+
+from langgraph.graph import StateGraph
+
+from app.core.metrics import record_node
+
+
+def instrument_node(graph: str, node: str, action: Callable) -> Callable:
+    """Wrap a node function so every run records its latency and errors."""
+    if inspect.iscoroutinefunction(action):
+
+        @functools.wraps(action)
+        async def async_wrapper(*args: Any, **kwargs: Any):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await action(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record_node(graph, node, time.perf_counter() - start, failed)
+
+        return async_wrapper
+
+    @functools.wraps(action)
+    def wrapper(*args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = action(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record_node(graph, node, time.perf_counter() - start, failed)
+
+    return wrapper
+
+
+class InstrumentedStateGraph(StateGraph):
+    """``StateGraph`` that instruments every node added to it.
+
+    ``metrics_name`` is the ``graph`` label used for the node metrics.
+    """
+
+    def __init__(self, state_schema, *args: Any, metrics_name: str = "graph", **kwargs: Any):
+        super().__init__(state_schema, *args, **kwargs)
+        self.metrics_name = metrics_name
+
+    def add_node(self, node, action=None, **kwargs: Any):
+        if action is None:
+            node, action = getattr(node, "__name__", str(node)), node
+        return super().add_node(
+            node, instrument_node(self.metrics_name, node, action), **kwargs
+        )
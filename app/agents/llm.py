@@ -0,0 +1,98 @@
+import asyncio
+import random
+import time
+import weakref
+from typing import Any, Optional
+
+import openai
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+from app.agents.tokens import aload_encoding, fit_prompt
+from app.core.config import settings
+from app.core.metrics import record_llm_call
+
+# Errors worth retrying: the request may succeed if sent again later
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Caps in-flight LLM calls across every graph running on an event loop. A
+# semaphore binds to the loop that first waits on it, so each loop (the
+# server's, a worker's, a test's) gets its own.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    """Return the running loop's LLM concurrency semaphore, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return semaphore
+
+
+async def ainvoke_llm(
+    llm: BaseChatModel,
+    prompt: Any,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    max_input_tokens: Optional[int] = None,
+    **kwargs: Any,
+) -> BaseMessage:
+    """
+    Call a chat model from a graph node without blocking the event loop.
+
+    This is the standard way for nodes to talk to an LLM. Each attempt waits
+    for a slot on the event loop's shared semaphore (``LLM_MAX_CONCURRENCY``)
+    and is cancelled after ``timeout`` seconds. Timeouts, connection errors,
+    rate limits and 5xx responses are retried with full-jitter exponential
+    backoff. Prompts over ``max_input_tokens``, counted with the model's
+    tokenizer, are trimmed first so no call ships an unbounded history.
+
+    Args:
+        llm: The chat model to call
+        prompt: Anything accepted by ``llm.ainvoke``
+        timeout: Per-attempt timeout, defaults to ``LLM_TIMEOUT``
+        max_retries: Retries after the first attempt, defaults to ``LLM_MAX_RETRIES``
+        max_input_tokens: Input token budget, defaults to ``LLM_MAX_INPUT_TOKENS``
+        **kwargs: Passed through to ``llm.ainvoke``
+
+    Returns:
+        The model's response message
+    """
+    timeout = settings.LLM_TIMEOUT if timeout is None else timeout
+    max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+
+    max_input_tokens = (
+        settings.LLM_MAX_INPUT_TOKENS if max_input_tokens is None else max_input_tokens
+    )
+
+    model = getattr(llm, "model_name", None) or type(llm).__name__
+    await aload_encoding(model)
+    prompt = fit_prompt(prompt, max_input_tokens, model)
+
+    for attempt in range(max_retries + 1):
+        try:
+            async with _semaphore():
+                start = time.perf_counter()
+                try:
+                    message = await asyncio.wait_for(llm.ainvoke(prompt, **kwargs), timeout)
+                except Exception as e:
+                    record_llm_call(model, time.perf_counter() - start, error=e)
+                    raise
+                record_llm_call(model, time.perf_counter() - start, message)
+                return message
+        except RETRYABLE_ERRORS:
+            if attempt == max_retries:
+                raise
+            backoff = min(
+                settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_RETRY_BACKOFF * 2**attempt
+            )
+            await asyncio.sleep(random.uniform(0, backoff))
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache import SQLiteCache, TieredCache, TTLCache
+from app.core.config import settings
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache() -> Iterator[None]:
+    """Skip the LLM response cache for every call made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _prompt_text(prompt: str) -> str:
+    """Extract the message text from a serialized chat prompt for embedding."""
+    try:
+        messages = json.loads(prompt)
+        return "\n".join(str(message["kwargs"]["content"]) for message in messages)
+    except (ValueError, TypeError, KeyError):
+        return prompt
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Response cache for chat models, passed as ``ChatOpenAI(cache=...)``.
+
+    The exact tier is keyed by a hash of the prompt and the serialized model
+    name and parameters, held in an LRU/TTL cache with an optional SQLite
+    file behind it. When ``embeddings`` is given, a semantic tier also reuses
+    the answer of an earlier prompt for the same model whose embedding has a
+    cosine similarity of at least ``similarity_threshold``.
+
+    Note that cached answers are returned even for sampled (temperature > 0)
+    models; use ``bypass_llm_cache`` where fresh output is required.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.95,
+        semantic_maxsize: int = 512,
+    ):
+        self.exact = TieredCache(
+            TTLCache(maxsize=maxsize, ttl=ttl),
+            SQLiteCache(path, table="llm_responses", ttl=ttl) if path else None,
+        )
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.semantic_maxsize = semantic_maxsize
+        # key -> (llm_string, unit vector, generations)
+        self._semantic: "OrderedDict[str, tuple]" = OrderedDict()
+        # Embeddings computed on a miss, reused when the answer is stored. A
+        # call that fails never stores its answer, so entries also expire.
+        self._pending_vectors = TTLCache(maxsize=semantic_maxsize, ttl=300)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, llm_string: str, vector: np.ndarray) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            candidates = [
+                (key, entry)
+                for key, entry in self._semantic.items()
+                if entry[0] == llm_string
+            ]
+            if not candidates:
+                return None
+            scores = np.stack([entry[1] for _, entry in candidates]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            key, entry = candidates[best]
+            self._semantic.move_to_end(key)
+            return entry[2]
+
+    def _remember(self, key: str, llm_string: str, vector, return_val) -> None:
+        with self._lock:
+            self._semantic[key] = (llm_string, vector, return_val)
+            self._semantic.move_to_end(key)
+            while len(self._semantic) > self.semantic_maxsize:
+                self._semantic.popitem(last=False)
+
+    def _hit(self, value: Optional[RETURN_VAL_TYPE], semantic: bool = False):
+        if value is None:
+            self.misses += 1
+        elif semantic:
+            self.semantic_hits += 1
+        else:
+            self.exact_hits += 1
+        return value
+
+    def _semantic_lookup(
+        self, key: str, llm_string: str, vector: np.ndarray
+    ) -> Optional[RETURN_VAL_TYPE]:
+        value = self._nearest(llm_string, vector)
+        if value is None:
+            self._pending_vectors.set(key, vector)
+        return self._hit(value, semantic=True)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass.get():
+            self.bypassed += 1
+            return None
+        key = self._key(prompt, llm_string)
+        value = self.exact.get(key)
+        if value is not None or self.embeddings is None:
+            return self._hit(value)
+
+        vector = self._unit(self.embeddings.embed_query(_prompt_text(prompt)))
+        return self._semantic_lookup(key, llm_string, vector)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass.get():
+            self.bypassed += 1
+            return None
+        key = self._key(prompt, llm_string)
+        value = self.exact.memory.get(key)
+        if value is None and self.exact.disk is not None:
+            value = await asyncio.to_thread(self.exact.disk.get, key)
+            if value is not None:
+                self.exact.memory.set(key, value)
+        if value is not None or self.embeddings is None:
+            return self._hit(value)
+
+        vector = self._unit(await self.embeddings.aembed_query(_prompt_text(prompt)))
+        return self._semantic_lookup(key, llm_string, vector)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _bypass.get():
+            return
+        key = self._key(prompt, llm_string)
+        self.exact.set(key, return_val)
+        if self.embeddings is not None:
+            vector = self._pending_vectors.get(key)
+            self._pending_vectors.delete(key)
+            if vector is None:
+                vector = self._unit(self.embeddings.embed_query(_prompt_text(prompt)))
+            self._remember(key, llm_string, vector, return_val)
+
+    async def aupdate(
+        self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE
+    ) -> None:
+        if _bypass.get():
+            return
+        key = self._key(prompt, llm_string)
+        if self.exact.disk is not None:
+            await asyncio.to_thread(self.exact.set, key, return_val)
+        else:
+            self.exact.set(key, return_val)
+        if self.embeddings is not None:
+            vector = self._pending_vectors.get(key)
+            self._pending_vectors.delete(key)
+            if vector is None:
+                vector = self._unit(
+                    await self.embeddings.aembed_query(_prompt_text(prompt))
+                )
+            self._remember(key, llm_string, vector, return_val)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.exact.clear()
+        with self._lock:
+            self._semantic.clear()
+            self._pending_vectors.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (
+                (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+            ),
+            "semantic_entries": len(self._semantic),
+            "tiers": self.exact.stats(),
+        }
+
+
+def build_llm_cache() -> Optional[LLMResponseCache]:
+    """Create the response cache described by the ``LLM_CACHE_*`` settings."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    embeddings = None
+    if settings.LLM_SEMANTIC_CACHE_ENABLED:
+        from app.core.vectorstore import get_embeddings
+
+        embeddings = get_embeddings()
+
+    return LLMResponseCache(
+        maxsize=settings.LLM_CACHE_MAXSIZE,
+        ttl=settings.LLM_CACHE_TTL,
+        path=settings.LLM_CACHE_PATH,
+        embeddings=embeddings,
+        similarity_threshold=settings.LLM_SEMANTIC_CACHE_THRESHOLD,
+    )
@@ -1,17 +1,26 @@
-from langgraph.graph import MessagesState
+from app.agents.history import with_summary
+from app.agents.routing import UNKNOWN, classify_with_llm, intent_router
+from app.agents.state import AgentState
+from app.core.config import settings
 
 
-def query_agent(state: MessagesState):
-    user_message = state["messages"][-1]["content"].lower()
+async def query_agent(state: AgentState):
+    user_message = state["messages"][-1].content
 
-    if "data" in user_message or "fetch" in user_message:
-        decision = "data"
-        content = "DeciderAgent: I will call DataAgent for this task."
-    elif "analyze" in user_message or "summary" in user_message:
-        decision = "analysis"
-        content = "DeciderAgent: I will call AnalysisAgent for this task."
+    intents = intent_router.match(user_message)
+    if not intents and settings.ROUTER_LLM_FALLBACK:
+        fallback = await classify_with_llm(with_summary(state))
+        intents = [fallback] if fallback else []
+
+    if intents:
+        decision = intents[0].name
+        content = f"DeciderAgent: I will call {intents[0].agent} for this task."
     else:
-        decision = "unknown"
+        decision = UNKNOWN
         content = "DeciderAgent: I couldn't decide which agent to call."
 
-    return {"decision": decision, "messages": [{"role": "ai", "content": content}]}
+    return {
+        "decision": decision,
+        "intents": [intent.name for intent in intents],
+        "messages": [{"role": "ai", "content": content}],
+    }
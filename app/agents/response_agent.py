@@ -1,8 +1,8 @@
-from langgraph.graph import MessagesState
+from app.agents.state import AgentState
 
 
-def response_agent(state: MessagesState):
-    last_message = state["messages"][-1]["content"]
+def response_agent(state: AgentState):
+    last_message = state["messages"][-1].content
     return {
         "messages": [
             {
@@ -0,0 +1,204 @@
+import re
+from typing import (
+    Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Sequence, Set, Tuple,
+)
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+
+from app.agents.llm import ainvoke_llm
+from app.core.config import settings
+from app.core.registry import registry
+
+UNKNOWN = "unknown"
+
+
+class Intent(NamedTuple):
+    """One row of the routing table.
+
+    ``keywords`` are literal words or phrases, ``patterns`` are regular
+    expression fragments for inflections (``analy[sz]\\w*``). Both only match
+    whole words. When several intents fire they all run in parallel; higher
+    ``priority`` sets the ``decision`` and ties go to the intent mentioned
+    first. ``timeout`` overrides ``BRANCH_TIMEOUT`` for this intent's agent.
+    """
+
+    name: str
+    target: str
+    agent: str
+    keywords: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+    priority: int = 0
+    description: str = ""
+    timeout: Optional[float] = None
+
+
+# The chat graph's routing table; query_agent and the graph's conditional
+# edges are both derived from it
+INTENTS: Tuple[Intent, ...] = (
+    Intent(
+        name="data",
+        target="data_agent",
+        agent="DataAgent",
+        keywords=("look up", "lookup", "retrieve"),
+        patterns=(r"data\w*", r"fetch\w*"),
+        priority=20,
+        description="retrieve records or documents",
+    ),
+    Intent(
+        name="analysis",
+        target="analysis_agent",
+        agent="AnalysisAgent",
+        keywords=("compare",),
+        patterns=(r"analy[sz]\w*", r"summar\w*"),
+        priority=10,
+        description="analyse or summarise information",
+    ),
+)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build an alternation with shared prefixes factored out.
+
+    ``re`` tries alternatives one after another, so a flat ``a|b|c`` over
+    thousands of keywords is tested keyword by keyword at every position. A
+    prefix tree lets the engine discard whole branches after one character.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: longer keywords are tried first, then the prefix
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class IntentRouter:
+    """
+    Routing table compiled into one case-insensitive regular expression that
+    finds every intent in a single pass over the message.
+
+    All keywords share one prefix tree, captured as group ``k`` and mapped
+    back to their intents; each intent's patterns get a named group of their
+    own. Every alternative sits in a lookahead at each word boundary, so a
+    match for one intent never hides an overlapping match for another
+    (``look up`` vs ``look``, or a keyword that a pattern of another intent
+    also covers). A leading guard lookahead rejects positions where nothing
+    matches before any group is tried.
+    """
+
+    def __init__(self, intents: Sequence[Intent]):
+        self.intents = tuple(intents)
+        owners: Dict[str, Set[int]] = {}
+        for index, intent in enumerate(self.intents):
+            for keyword in intent.keywords:
+                owners.setdefault(keyword.lower(), set()).add(index)
+        # The trie captures the longest keyword at a position; shorter
+        # keywords that end on a word boundary inside it matched there too
+        self._keywords: Dict[str, FrozenSet[int]] = {}
+        for keyword in owners:
+            found = set(owners[keyword])
+            for boundary in re.finditer(r"\b", keyword):
+                found |= owners.get(keyword[: boundary.start()], set())
+            self._keywords[keyword] = frozenset(found)
+
+        self._groups: List[Tuple[str, int]] = []
+        alternatives = []
+        if owners:
+            alternatives.append(("k", _trie_pattern(sorted(owners))))
+        for index, intent in enumerate(self.intents):
+            if intent.patterns:
+                name = f"p{index}"
+                self._groups.append((name, index))
+                alternatives.append((name, "|".join(f"(?:{p})" for p in intent.patterns)))
+        self._regex: Optional[Pattern[str]] = None
+        if alternatives:
+            guard = "|".join(body for _, body in alternatives)
+            groups = "".join(rf"(?=(?P<{name}>{body})\b)?" for name, body in alternatives)
+            self._regex = re.compile(rf"\b(?=(?:{guard})\b){groups}", re.IGNORECASE)
+
+    def match(self, text: str) -> List[Intent]:
+        """Return every intent that fires on ``text``, best first."""
+        first_seen: Dict[int, int] = {}
+        if self._regex is not None:
+            for found in self._regex.finditer(text):
+                position = found.start()
+                keyword = found.group("k") if self._keywords else None
+                if keyword is not None:
+                    for index in self._keywords.get(keyword.lower(), ()):
+                        first_seen.setdefault(index, position)
+                for name, index in self._groups:
+                    if found.group(name) is not None:
+                        first_seen.setdefault(index, position)
+        ranked = sorted(
+            first_seen, key=lambda index: (-self.intents[index].priority, first_seen[index])
+        )
+        return [self.intents[index] for index in ranked]
+
+    def targets(self) -> Dict[str, str]:
+        """Map each intent name to the graph node that handles it."""
+        return {intent.name: intent.target for intent in self.intents}
+
+    def get(self, name: str) -> Optional[Intent]:
+        for intent in self.intents:
+            if intent.name == name:
+                return intent
+        return None
+
+
+intent_router = IntentRouter(INTENTS)
+
+
+def create_router_llm():
+    return ChatOpenAI(
+        model_name=settings.ROUTER_LLM_MODEL,
+        temperature=0,
+        api_key=settings.OPENAI_API_KEY,
+        cache=registry.get("llm_cache"),
+        max_retries=0,  # retries are handled by ainvoke_llm
+    )
+
+
+async def classify_with_llm(
+    messages: Sequence[BaseMessage], router: IntentRouter = intent_router
+) -> Optional[Intent]:
+    """
+    Ask the router LLM to pick an intent when no rule fired.
+
+    Only used when ``ROUTER_LLM_FALLBACK`` is enabled. The model sees the
+    conversation so far, so a follow-up such as "same for last year" is
+    classified in context. Any answer that is not one of the table's intent
+    names is treated as unknown.
+
+    Args:
+        messages: The conversation ending with the user's message, as built
+            by ``history.with_summary``.
+        router: Routing table whose intents are offered to the model.
+
+    Returns:
+        The chosen intent, or None when the model answers unknown.
+    """
+    options = "\n".join(
+        f"- {intent.name}: {intent.description}" for intent in router.intents
+    )
+    instructions = (
+        "Classify the user's latest request into exactly one of these intents and "
+        f"reply with the intent name only, or '{UNKNOWN}' if none applies.\n"
+        f"{options}"
+    )
+    reply = await ainvoke_llm(
+        registry.get("router_llm"), [SystemMessage(content=instructions), *messages]
+    )
+    return router.get(reply.content.strip().strip("'\".").lower())
@@ -0,0 +1,34 @@
+from typing import Annotated, Any, Dict, List, Optional
+
+from langgraph.graph import MessagesState
+
+
+def merge_results(left: Dict[str, Any], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reducer letting parallel branches each add their own ``results`` entry.
+
+    Writing ``None`` clears the entries, which is how a new turn drops the
+    previous turn's results from the checkpointed state.
+    """
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+
+class AgentState(MessagesState):
+    """Shared state for the chat graph.
+
+    ``query_agent`` writes ``intents``, every intent the router detected best
+    first, and ``decision``, the top one. Routing fans out to one agent per
+    intent. Each worker agent that runs adds ``results[intent]`` with its
+    status, result and reply; ``result`` is the joined outcome of the turn.
+    ``user_id`` identifies the sender, whose documents ``data_agent`` searches.
+    ``summary`` is the running summary of turns ``compact_history`` removed.
+    """
+
+    user_id: Optional[int]
+    decision: str
+    intents: List[str]
+    results: Annotated[Dict[str, Dict[str, Any]], merge_results]
+    result: str
+    summary: str
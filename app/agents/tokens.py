@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, convert_to_messages
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langchain_core.prompt_values import PromptValue
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Per-message framing tokens in the OpenAI chat format, plus reply priming
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Seconds before a tokenizer that failed to load is tried again
+ENCODING_RETRY_INTERVAL = 60.0
+
+# Loaded encodings by model name; failures are not stored, only timed
+_encodings: Dict[str, Any] = {}
+_failed_at: Dict[str, float] = {}
+_load_lock = threading.Lock()
+
+
+def load_encoding(model: Optional[str] = None):
+    """
+    Load the tiktoken encoding for ``model``, or return None if it cannot be.
+
+    Unknown models use ``TOKENIZER_ENCODING``. tiktoken downloads encoding
+    files on first use, so this blocks: call it at startup (the
+    ``tokenizers`` component) or through ``aload_encoding``. A failed load
+    (no network and no cache) is retried after ``ENCODING_RETRY_INTERVAL``
+    seconds; until then token counts use LangChain's approximation.
+    """
+    key = model or ""
+    with _load_lock:
+        if key in _encodings:
+            return _encodings[key]
+        failed_at = _failed_at.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_INTERVAL:
+            return None
+        try:
+            import tiktoken
+
+            try:
+                encoding = tiktoken.encoding_for_model(key)
+            except KeyError:
+                encoding = tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+        except Exception as e:
+            _failed_at[key] = time.monotonic()
+            logger.warning(f"tiktoken unavailable, approximating token counts: {str(e)}")
+            return None
+        _failed_at.pop(key, None)
+        _encodings[key] = encoding
+        return encoding
+
+
+async def aload_encoding(model: Optional[str] = None):
+    """``load_encoding`` off the event loop; returns at once when already loaded."""
+    key = model or ""
+    if key in _encodings:
+        return _encodings[key]
+    failed_at = _failed_at.get(key)
+    if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_INTERVAL:
+        return None
+    return await asyncio.to_thread(load_encoding, model)
+
+
+def load_encodings() -> Dict[str, Any]:
+    """Load the encodings of the configured chat models; the ``tokenizers`` component."""
+    for model in {settings.ROUTER_LLM_MODEL, settings.SUMMARY_LLM_MODEL}:
+        load_encoding(model)
+    return _encodings
+
+
+def get_encoding(model: Optional[str] = None):
+    """
+    Return the encoding for ``model`` if it is loaded, else None.
+
+    Never loads anything, so it is safe on the event loop; async callers
+    ``await aload_encoding(model)`` first.
+    """
+    return _encodings.get(model or "")
+
+
+def count_text_tokens(text: str, model: Optional[str] = None) -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return count_tokens_approximately([text]) - TOKENS_PER_MESSAGE
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def token_counter(model: Optional[str] = None) -> Callable[[Sequence[BaseMessage]], int]:
+    """Message token counter for ``trim_messages`` using the model's tokenizer."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return count_tokens_approximately
+
+    def count(messages: Sequence[BaseMessage]) -> int:
+        total = TOKENS_PER_REPLY
+        for message in messages:
+            total += TOKENS_PER_MESSAGE + len(
+                encoding.encode(message.text, disallowed_special=())
+            )
+        return total
+
+    return count
+
+
+def truncate_text(text: str, max_tokens: int, model: Optional[str] = None, keep: str = "last") -> str:
+    """Cut ``text`` to ``max_tokens``, keeping its ``"first"`` or ``"last"`` tokens."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Roughly four characters per token
+        limit = max_tokens * 4
+        return text[-limit:] if keep == "last" else text[:limit]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    tokens = tokens[-max_tokens:] if keep == "last" else tokens[:max_tokens]
+    return encoding.decode(tokens)
+
+
+def fit_prompt(prompt: Any, max_tokens: int, model: Optional[str] = None) -> Any:
+    """
+    Trim a prompt to at most ``max_tokens`` input tokens.
+
+    Message lists keep their system message and drop the oldest turns first,
+    starting the kept history on a human message; a string keeps its last
+    tokens. Prompts within the budget are returned unchanged.
+
+    Args:
+        prompt: A string, a ``PromptValue`` or a list of messages
+        max_tokens: Input token budget for the call
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        The prompt, trimmed if it was over budget.
+    """
+    if isinstance(prompt, str):
+        if count_text_tokens(prompt, model) <= max_tokens:
+            return prompt
+        logger.warning("Prompt over token budget, truncating", extra={"max_tokens": max_tokens})
+        return truncate_text(prompt, max_tokens, model)
+
+    messages: List[BaseMessage] = (
+        prompt.to_messages() if isinstance(prompt, PromptValue) else convert_to_messages(prompt)
+    )
+    counter = token_counter(model)
+    tokens = counter(messages)
+    if tokens <= max_tokens:
+        return prompt
+    trimmed = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=counter,
+        strategy="last",
+        include_system=True,
+        start_on="human",
+        allow_partial=True,
+    )
+    logger.warning(
+        "Prompt over token budget, dropping oldest messages",
+        extra={"tokens": tokens, "max_tokens": max_tokens, "kept": len(trimmed), "of": len(messages)},
+    )
+    return trimmed
@@ -1,15 +1,23 @@
+import asyncio
 from typing_extensions import TypedDict
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import START, END
 
 # from IPython.display import Image, display
 from langchain_openai import ChatOpenAI
 from app.core.config import settings
+from app.agents.instrumentation import InstrumentedStateGraph
+from app.agents.llm import ainvoke_llm
+from app.core.registry import registry
 
-llm = ChatOpenAI(
-    model_name="gpt-3.5-turbo",
-    temperature=0.7,
-    api_key=settings.OPENAI_API_KEY,
-)
+
+def create_llm():
+    return ChatOpenAI(
+        model_name="gpt-3.5-turbo",
+        temperature=0.7,
+        api_key=settings.OPENAI_API_KEY,
+        cache=registry.get("llm_cache"),
+        max_retries=0,  # retries are handled by ainvoke_llm
+    )
 
 
 # Graph state
@@ -21,10 +29,11 @@ class State(TypedDict):
 
 
 # Nodes
-def generate_joke(state: State):
+async def generate_joke(state: State):
     """First LLM call to generate initial joke"""
 
-    msg = llm.invoke(f"Write a short joke about {state['topic']}")
+    llm = registry.get("workflow_llm")
+    msg = await ainvoke_llm(llm, f"Write a short joke about {state['topic']}")
     return {"joke": msg.content}
 
 
@@ -37,21 +46,27 @@ def check_punchline(state: State):
     return "Fail"
 
 
-def improve_joke(state: State):
+async def improve_joke(state: State):
     """Second LLM call to improve the joke"""
 
-    msg = llm.invoke(f"Make this joke funnier by adding wordplay: {state['joke']}")
+    llm = registry.get("workflow_llm")
+    msg = await ainvoke_llm(
+        llm, f"Make this joke funnier by adding wordplay: {state['joke']}"
+    )
     return {"improved_joke": msg.content}
 
 
-def polish_joke(state: State):
+async def polish_joke(state: State):
     """Third LLM call for final polish"""
-    msg = llm.invoke(f"Add a surprising twist to this joke: {state['improved_joke']}")
+    llm = registry.get("workflow_llm")
+    msg = await ainvoke_llm(
+        llm, f"Add a surprising twist to this joke: {state['improved_joke']}"
+    )
     return {"final_joke": msg.content}
 
 
 # Build workflow
-workflow = StateGraph(State)
+workflow = InstrumentedStateGraph(State, metrics_name="workflow")
 
 # Add nodes
 workflow.add_node("generate_joke", generate_joke)
@@ -66,23 +81,28 @@ workflow.add_conditional_edges(
 workflow.add_edge("improve_joke", "polish_joke")
 workflow.add_edge("polish_joke", END)
 
-# Compile
-chain = workflow.compile()
+
+# Compile lazily through the registry ("workflow_chain")
+def build_workflow():
+    return workflow.compile()
+
 
 # Show workflow
 # display(Image(chain.get_graph().draw_mermaid_png()))
 
-# Invoke
-state = chain.invoke({"topic": "cats"})
-print("Initial joke:")
-print(state["joke"])
-print("\n--- --- ---\n")
-if "improved_joke" in state:
-    print("Improved joke:")
-    print(state["improved_joke"])
+if __name__ == "__main__":
+    # Invoke
+    chain = registry.get("workflow_chain")
+    state = asyncio.run(chain.ainvoke({"topic": "cats"}))
+    print("Initial joke:")
+    print(state["joke"])
     print("\n--- --- ---\n")
-
-    print("Final joke:")
-    print(state["final_joke"])
-else:
-    print("Joke failed quality gate - no punchline detected!")
+    if "improved_joke" in state:
+        print("Improved joke:")
+        print(state["improved_joke"])
+        print("\n--- --- ---\n")
+
+        print("Final joke:")
+        print(state["final_joke"])
+    else:
+        print("Joke failed quality gate - no punchline detected!")
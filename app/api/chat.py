@@ -1,13 +1,26 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, File, Form, Header, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.services.agent_service import AgentService
+from app.services.idempotency_service import (
+    IdempotencyConflict,
+    chat_key,
+    fingerprint,
+    idempotency_service,
+)
 import os
-from app.core.s3_bucket import s3_client, S3_BUCKET
+from app.core.s3_bucket import S3_BUCKET
+from app.services.upload_service import stream_upload, UploadTooLarge
+from app.services.ingestion_service import document_kind, ingest_s3_object
 from app.core.logger import logger
+from app.core.config import settings
+from app.core.ratelimit import Overloaded, RateLimited, admission, rate_limiter
+import math
 import uuid
+import json
 from botocore.exceptions import ClientError
 from fastapi import status
-from typing import Optional
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
 
 router = APIRouter()
 
@@ -15,31 +28,272 @@ router = APIRouter()
 class ChatRequest(BaseModel):
     message: str
     thread_id: str
+    user_id: Optional[int] = None
+
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+    concurrency: Optional[int] = None
+    stream: bool = False
+
+
+def _rate_limit_key(request: ChatRequest) -> str:
+    """Bucket a turn is charged to: its user, else its thread."""
+    if request.user_id is not None:
+        return f"user:{request.user_id}"
+    return f"thread:{request.thread_id}"
+
+
+async def check_rate_limit(key: str, cost: float = 1.0) -> None:
+    """Take ``cost`` tokens from ``key``'s bucket, answering 429 when it is short."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    try:
+        await rate_limiter.check(key, cost)
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+
+async def _check_rate_limit(request: ChatRequest, cost: float = 1.0) -> None:
+    """Take ``cost`` tokens from the caller's bucket."""
+    await check_rate_limit(_rate_limit_key(request), cost)
+
+
+async def _acquire_slot() -> Optional[float]:
+    """
+    Wait for a graph execution slot.
+
+    Returns:
+        The admission token to pass to ``_release``, or None when admission
+        control is off
+    """
+    if not settings.ADMISSION_ENABLED:
+        return None
+    try:
+        return await admission.acquire()
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+
+async def _admit(request: ChatRequest) -> Optional[float]:
+    """
+    Apply the caller's rate limit, then wait for a graph execution slot.
+
+    Rejections are raised as 429 (rate limited) or 503 (overloaded) with a
+    ``Retry-After`` header, before any graph work is done.
+    """
+    await _check_rate_limit(request)
+    return await _acquire_slot()
+
+
+def _release(started: Optional[float]) -> None:
+    if started is not None:
+        admission.release(started)
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """
+    Streaming response that hands its admission slot back when sending ends.
+
+    The body generator releases the slot as it finishes, but it never runs
+    if the response fails or the client leaves before the first chunk, and
+    a background task is skipped on errors; this covers every other way out.
+    ``release`` must be safe to call more than once.
+    """
+
+    def __init__(self, content: AsyncIterator[str], release: Callable[[], None], **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self._release_slot = release
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release_slot()
 
 
 @router.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(
+    request: ChatRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    """
+    Run one chat turn.
 
+    A retry sent with the same ``Idempotency-Key`` gets the original
+    response, whether that turn is still running or already finished,
+    instead of running again. Identical turns on a thread that arrive
+    while one is running share its execution even without a key. Shared
+    responses carry ``Idempotent-Replayed: true``; reusing a key for a
+    different request is a 422. Only a turn that actually runs is charged
+    to the caller's rate limit, so retries are never answered with a 429.
+    """
     agent_service = AgentService()
 
+    async def execute() -> Dict[str, Any]:
+        started = await _acquire_slot()
+        try:
+            return await agent_service.process_message(
+                user_message=request.message,
+                thread_id=request.thread_id,
+                user_id=request.user_id,
+            )
+        finally:
+            _release(started)
+
+    key, store = chat_key(
+        request.thread_id, request.message, request.user_id, idempotency_key
+    )
     try:
-        response = await agent_service.process_message(
-            user_message=request.message,
-            thread_id=request.thread_id,
+        result, shared = await idempotency_service.run(
+            key,
+            fingerprint(request.thread_id, request.user_id, request.message),
+            execute,
+            store=store,
+            admit=lambda: _check_rate_limit(request),
         )
-        return response
+    except HTTPException:
+        raise
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if shared:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Stream a chat turn as server-sent events.
+
+    Emits a ``node`` event as each graph node finishes, ``token`` events with
+    LLM token deltas, and a final ``done`` event carrying the same payload as
+    ``POST /chat``. Failures are reported as an ``error`` event. Rate limits
+    and admission control apply as for ``POST /chat``; the execution slot is
+    held until the stream ends.
+    """
+    agent_service = AgentService()
+    started = await _admit(request)
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            _release(started)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in agent_service.stream_message(
+                user_message=request.message,
+                thread_id=request.thread_id,
+                user_id=request.user_id,
+            ):
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}", exc_info=True)
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Also runs when the client disconnects mid-stream
+            release()
+
+    return _SlotStreamingResponse(
+        event_stream(),
+        release,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchChatRequest):
+    """
+    Run many chat turns through the agent graph with bounded concurrency.
+
+    Each item succeeds or fails on its own. By default the results are
+    returned together in input order; with ``stream`` set they are sent as
+    newline-delimited JSON in completion order, each tagged with its ``index``.
+
+    Every item costs one rate-limit token from its own user's (or thread's)
+    bucket, taken before anything runs, so a batch is a 429 when any caller
+    lacks the tokens; tokens already taken from the other callers are then
+    given back. Each item also waits for its own admission slot while
+    it runs; an item shed by admission control fails alone.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds the limit of {settings.BATCH_MAX_ITEMS} items",
+        )
+
+    charges: Dict[str, List[ChatRequest]] = {}
+    for item in request.items:
+        charges.setdefault(_rate_limit_key(item), []).append(item)
+    charged: List[Tuple[str, int]] = []
+    try:
+        for key, items_for_key in charges.items():
+            await check_rate_limit(key, cost=len(items_for_key))
+            charged.append((key, len(items_for_key)))
+    except HTTPException:
+        for key, cost in charged:
+            await rate_limiter.refund(key, cost)
+        raise
+
+    concurrency = min(
+        request.concurrency or settings.BATCH_MAX_CONCURRENCY,
+        settings.BATCH_MAX_CONCURRENCY,
+    )
+    items = [item.model_dump() for item in request.items]
+    agent_service = AgentService()
+    slots = admission if settings.ADMISSION_ENABLED else None
+
+    if request.stream:
+
+        async def result_stream() -> AsyncIterator[str]:
+            async for result in agent_service.iter_batch(items, concurrency, slots):
+                yield json.dumps(result, default=str) + "\n"
+
+        return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+    results = await agent_service.process_batch(items, concurrency, slots)
+    return {"results": results}
 
 
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
-async def upload_file(file: UploadFile = File(...), description: Optional[str] = None):
+async def upload_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    description: Optional[str] = None,
+    user_id: Optional[int] = Form(None),
+):
     """
     Upload a file to Amazon S3 bucket
 
+    PDFs and text files uploaded with a ``user_id`` are then ingested into
+    Qdrant in the background, under that user, so ``data_agent`` can search
+    them. Without a ``user_id`` the file is only stored.
+
     Args:
+        background_tasks: Runs the ingestion after the response is sent
         file: The file to upload
         description: Optional description of the file
+        user_id: Owner of the file, sent as a form field
 
     Returns:
         Dictionary containing the S3 URL and file metadata
@@ -49,17 +303,14 @@ async def upload_file(file: UploadFile = File(...), description: Optional[str] =
         file_extension = os.path.splitext(file.filename)[1]
         unique_filename = f"{uuid.uuid4()}{file_extension}"
 
-        # Upload file to S3
-        s3_client.upload_fileobj(
-            file.file,
-            S3_BUCKET,
+        # Stream the file to S3 in parts, off the event loop
+        upload = await stream_upload(
+            file,
             unique_filename,
-            ExtraArgs={
-                "ContentType": file.content_type,
-                "Metadata": {
-                    "original_filename": file.filename,
-                    "description": description or "",
-                },
+            content_type=file.content_type,
+            metadata={
+                "original_filename": file.filename,
+                "description": description or "",
             },
         )
 
@@ -70,11 +321,25 @@ async def upload_file(file: UploadFile = File(...), description: Optional[str] =
             f"File uploaded to S3: {file.filename}",
             extra={
                 "s3_key": unique_filename,
-                "file_size": file.size,
+                "file_size": upload["size"],
                 "content_type": file.content_type,
+                "parts": upload["parts"],
+                "seconds": upload["seconds"],
+                "throughput_mbps": upload["throughput_mbps"],
             },
         )
 
+        # Chunks without a user_id would never match a user's search
+        ingest = user_id is not None and document_kind(file.content_type, file.filename) is not None
+        if ingest:
+            background_tasks.add_task(
+                ingest_s3_object,
+                unique_filename,
+                content_type=file.content_type,
+                file_name=file.filename,
+                metadata={"user_id": user_id},
+            )
+
         return {
             "message": "File uploaded successfully",
             "filename": file.filename,
@@ -82,8 +347,16 @@ async def upload_file(file: UploadFile = File(...), description: Optional[str] =
             "file_url": file_url,
             "content_type": file.content_type,
             "description": description,
+            "size": upload["size"],
+            "sha256": upload["sha256"],
+            "throughput_mbps": upload["throughput_mbps"],
+            "ingestion": "queued" if ingest else "skipped",
         }
 
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
     except ClientError as e:
         logger.error(f"S3 upload error: {str(e)}", exc_info=True)
         raise HTTPException(
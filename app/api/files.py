@@ -0,0 +1,108 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.services.file_service import FileNotFound, UploadRejected, file_service
+from app.services.ingestion_service import document_kind, ingest_s3_object
+
+router = APIRouter()
+
+
+class PresignUploadRequest(BaseModel):
+    user_id: int
+    file_name: str
+    size: int
+    content_type: Optional[str] = None
+
+
+class UploadedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    user_id: int
+    key: str
+    file_name: str
+    upload_id: Optional[str] = None
+    parts: Optional[List[UploadedPart]] = None
+
+
+@router.post("/presign")
+async def presign_upload(request: PresignUploadRequest):
+    """
+    Get presigned URLs for uploading a file directly to S3.
+
+    Small files get one ``url`` to PUT to; large files get an ``upload_id`` and
+    one URL per part. Call ``/files/complete`` once the upload has finished.
+    """
+    try:
+        return await file_service.presign_upload(
+            request.user_id, request.file_name, request.size, request.content_type
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+
+
+@router.post("/complete", status_code=status.HTTP_201_CREATED)
+async def complete_upload(
+    request: CompleteUploadRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Finish a direct upload and record the file for the user.
+
+    Objects whose size differs from the presigned one, or exceeds the limit,
+    are deleted and answered with 413. Completing an already recorded upload
+    returns the existing record with ``ingestion`` set to
+    ``already_recorded``. Newly recorded PDFs and text files are then
+    ingested into Qdrant in the background (``queued``); other files are
+    ``skipped``.
+    """
+    try:
+        record, created = await file_service.complete_upload(
+            db,
+            request.user_id,
+            request.key,
+            request.file_name,
+            upload_id=request.upload_id,
+            parts=[part.model_dump() for part in request.parts or []],
+        )
+    except FileNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    except UploadRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+
+    if document_kind(record["content_type"], record["file_name"]) is None:
+        ingestion = "skipped"
+    elif not created:
+        # An earlier completion already queued it
+        ingestion = "already_recorded"
+    else:
+        background_tasks.add_task(
+            ingest_s3_object,
+            record["file_path"],
+            content_type=record["content_type"],
+            file_name=record["file_name"],
+            metadata={"user_id": record["user_id"], "file_id": record["id"]},
+        )
+        ingestion = "queued"
+    return {**record, "ingestion": ingestion}
+
+
+@router.get("/{file_id}/download")
+async def download_file(
+    file_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    """Get a short-lived presigned URL for reading a file; ``Range`` requests are supported."""
+    try:
+        return await file_service.presign_download(db, user_id, file_id)
+    except FileNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from app.api.chat import check_rate_limit
+from app.core.config import settings
+from app.services.job_service import TERMINAL_STATUSES, JobNotFound, job_service
+
+router = APIRouter()
+
+
+class WorkflowPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    topic: str
+    no_cache: bool = False
+
+
+class ChatPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    message: str
+    thread_id: str
+    user_id: Optional[int] = None
+
+
+# Payload model for each job kind, checked on submit
+JOB_PAYLOADS = {"workflow": WorkflowPayload, "chat": ChatPayload}
+
+
+class JobRequest(BaseModel):
+    kind: Literal["workflow", "chat"]
+    payload: Dict[str, Any]
+    user_id: Optional[int] = None
+    max_attempts: Optional[int] = Field(None, ge=1, le=settings.JOB_MAX_ATTEMPTS_LIMIT)
+
+
+def _validate_payload(request: JobRequest) -> Dict[str, Any]:
+    """Check the payload against its kind's model; a mismatch is a 422."""
+    try:
+        payload = JOB_PAYLOADS[request.kind].model_validate(request.payload)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", "payload", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ]
+        )
+    return payload.model_dump()
+
+
+def _rate_limit_key(
+    request: JobRequest, payload: Dict[str, Any], client_host: Optional[str] = None
+) -> str:
+    """
+    Bucket a submit is charged to, shared with ``POST /chat`` for chat jobs.
+
+    Anonymous workflow jobs have no user or thread, so each client address
+    gets its own bucket rather than all of them sharing one.
+    """
+    user_id = request.user_id if request.user_id is not None else payload.get("user_id")
+    if user_id is not None:
+        return f"user:{user_id}"
+    if request.kind == "chat":
+        return f"thread:{payload['thread_id']}"
+    if client_host:
+        return f"client:{client_host}"
+    return "jobs:anonymous"
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(request: JobRequest, http_request: Request):
+    """
+    Queue a long-running agent run and return at once.
+
+    ``workflow`` jobs take ``{"topic"}``, plus ``"no_cache": true`` to skip
+    the LLM response cache, and run the workflow chain; ``chat``
+    jobs take ``{"message", "thread_id"}`` and run one chat turn. Poll
+    ``GET /jobs/{id}`` or stream ``GET /jobs/{id}/events`` for the result.
+
+    A payload that does not match its kind, or a ``max_attempts`` above
+    ``JOB_MAX_ATTEMPTS_LIMIT``, is a 422. Every submit takes a token from
+    the caller's rate-limit bucket, the same one ``POST /chat`` uses, so
+    queueing chat jobs is no way around the chat rate limit. Anonymous
+    workflow jobs are charged to the client's address.
+    """
+    payload = _validate_payload(request)
+    if request.kind == "chat" and payload["user_id"] is None:
+        payload["user_id"] = request.user_id
+    client_host = http_request.client.host if http_request.client else None
+    await check_rate_limit(_rate_limit_key(request, payload, client_host))
+    return await job_service.submit(
+        request.kind,
+        payload,
+        user_id=request.user_id,
+        max_attempts=request.max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Return a job's status, attempts and, once finished, result or error."""
+    try:
+        return await job_service.get(job_id)
+    except JobNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get("/{job_id}/events")
+async def stream_job(job_id: str):
+    """
+    Stream a job's progress as server-sent events.
+
+    Emits a ``status`` event whenever the status or attempt count changes
+    and a final ``done`` event with the finished job, then closes.
+    """
+    try:
+        job = await job_service.get(job_id)
+    except JobNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    async def event_stream() -> AsyncIterator[str]:
+        current = job
+        seen = None
+        while True:
+            if current["status"] in TERMINAL_STATUSES:
+                yield _sse("done", current)
+                return
+            if (current["status"], current["attempts"]) != seen:
+                seen = (current["status"], current["attempts"])
+                yield _sse("status", current)
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+            current = await job_service.get(job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a job.
+
+    Queued jobs are cancelled immediately; running jobs stop at their
+    worker's next heartbeat. Finished jobs are returned unchanged.
+    """
+    try:
+        return await job_service.cancel(job_id)
+    except JobNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.core.database import pool_stats
+from app.core.registry import registry
+from app.core.logger import cloudwatch_logger
+from app.core.metrics import REGISTRY
+from app.core.ratelimit import admission, rate_limiter
+from app.services.idempotency_service import idempotency_service
+
+router = APIRouter()
+# Mounted at the application root, where Prometheus scrapes by default
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose node, endpoint and LLM metrics in Prometheus text format."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Return usage statistics for the async database connection pool."""
+    return pool_stats.snapshot()
+
+
+@router.get("/llm-cache")
+async def llm_cache_stats():
+    """Return hit/miss counters for the LLM response cache."""
+    if not registry.is_loaded("llm_cache"):
+        return {"loaded": False}
+    llm_cache = registry.get("llm_cache")
+    return llm_cache.stats() if llm_cache is not None else {"enabled": False}
+
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    """Return hit/miss counters for the embedding cache."""
+    if not registry.is_loaded("embeddings"):
+        return {"loaded": False}
+    embeddings = registry.get("embeddings")
+    if not hasattr(embeddings, "stats"):
+        return {"enabled": False}
+    return embeddings.stats()
+
+
+@router.get("/admission")
+async def admission_stats():
+    """Return rate limiter rejections and the admission queue's current state."""
+    return {"rate_limit": rate_limiter.stats(), "admission": admission.stats()}
+
+
+@router.get("/idempotency")
+async def idempotency_stats():
+    """Return how many chat turns ran, were coalesced, or were replayed."""
+    return idempotency_service.stats()
+
+
+@router.get("/startup")
+async def startup_report():
+    """Return the creation cost of each lazily created component."""
+    return {"components": registry.report()}
+
+
+@router.get("/logging")
+async def logging_stats():
+    """Return queue depth, dropped and sampled-out counts of the log pipeline."""
+    return cloudwatch_logger.stats()
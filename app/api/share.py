@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.services.share_service import share_service
+
+router = APIRouter()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as ``If-None-Match`` requires, with ``*`` matching any tag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+@router.get("/{uid}")
+async def get_shared_thread(uid: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Return the snapshot of a shared thread.
+
+    The response carries an ``ETag``; clients sending it back in
+    ``If-None-Match`` get an empty 304 while the thread is unchanged.
+    """
+    snapshot = await share_service.get_snapshot(uid)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Share not found")
+
+    body, etag = snapshot
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=0, must-revalidate"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,49 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.services.history_service import HistoryService, InvalidCursor
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_threads(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List a user's threads, newest first.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to fetch the next page.
+    """
+    try:
+        return await HistoryService(db).list_threads(user_id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/{thread_id}/messages")
+async def list_messages(
+    thread_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List a thread's messages, newest first.
+
+    ``artifact_ids``, ``artifacts_query_template`` and ``suggested_questions``
+    are only loaded when named in ``include``.
+    """
+    try:
+        return await HistoryService(db).list_messages(
+            thread_id, limit, cursor, include or ()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
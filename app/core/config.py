@@ -1,3 +1,4 @@
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -18,6 +19,137 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str
     SECRET_KEY: str
 
+    # Async connection pool settings
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Conversation state persistence
+    CHECKPOINTER_ENABLED: bool = False
+    CHECKPOINT_POOL_SIZE: int = 10
+    HISTORY_MAX_MESSAGES: int = 20
+    HISTORY_MAX_TOKENS: int = 4000
+    HISTORY_KEEP_TURNS: int = 4
+    HISTORY_COMPACT_EVERY: int = 4
+    HISTORY_SUMMARIZE: bool = True
+    HISTORY_SUMMARY_MAX_TOKENS: int = 600
+    SUMMARY_LLM_MODEL: str = "gpt-3.5-turbo"
+
+    # Write-behind message persistence
+    MESSAGE_FLUSH_BATCH_SIZE: int = 100
+    MESSAGE_FLUSH_INTERVAL: float = 0.5
+    MESSAGE_BUFFER_MAX: int = 10000
+
+    # Shared thread snapshots
+    SHARE_CACHE_MAXSIZE: int = 1024
+    SHARE_CACHE_TTL: int = 300
+    SHARE_CACHE_MEMORY_TTL: float = 5.0
+    SHARE_CACHE_PATH: Optional[str] = None
+
+    # LLM response cache
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAXSIZE: int = 1024
+    LLM_CACHE_TTL: Optional[int] = 3600
+    LLM_CACHE_PATH: Optional[str] = None
+    LLM_SEMANTIC_CACHE_ENABLED: bool = False
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.95
+
+    # LLM call limits
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_TIMEOUT: float = 30.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BACKOFF: float = 0.5
+    LLM_RETRY_BACKOFF_MAX: float = 8.0
+    LLM_MAX_INPUT_TOKENS: int = 12000
+    TOKENIZER_ENCODING: str = "cl100k_base"
+
+    # Intent routing: ask an LLM only when no routing rule matches
+    ROUTER_LLM_FALLBACK: bool = False
+    ROUTER_LLM_MODEL: str = "gpt-3.5-turbo"
+    BRANCH_TIMEOUT: float = 20.0
+
+    # S3 uploads
+    S3_UPLOAD_PART_SIZE: int = 8 * 1024 * 1024
+    S3_UPLOAD_MAX_SIZE: int = 512 * 1024 * 1024
+    S3_UPLOAD_CONCURRENCY: int = 8
+    S3_PRESIGN_EXPIRES: int = 900
+    # Must stay below S3_PRESIGN_EXPIRES so cached URLs are still valid
+    S3_DOWNLOAD_URL_CACHE_TTL: int = 600
+
+    # Document ingestion into Qdrant
+    QDRANT_COLLECTION: str = "documents"
+    QDRANT_COLLECTION_PER_USER: bool = False
+    QDRANT_QUANTIZATION: str = "scalar"  # "scalar", "binary" or "none"
+    QDRANT_ON_DISK: bool = True
+    INGEST_CHUNK_SIZE: int = 1000
+    INGEST_CHUNK_OVERLAP: int = 200
+    INGEST_TEXT_PAGE_CHARS: int = 8000
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_EMBED_CONCURRENCY: int = 4
+    INGEST_UPSERT_CONCURRENCY: int = 2
+    INGEST_QUEUE_SIZE: int = 4
+    INGEST_SPOOL_SIZE: int = 8 * 1024 * 1024
+
+    # Embedding cache shared by ingestion and query-time embedding
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAXSIZE: int = 10000
+    EMBEDDING_CACHE_PATH: Optional[str] = None
+
+    # Retrieval for data_agent
+    RETRIEVAL_TOP_K: int = 5
+    RETRIEVAL_MAX_SUBQUERIES: int = 4
+    RETRIEVAL_OVERSAMPLING: float = 2.0
+    RETRIEVAL_CACHE_MAXSIZE: int = 1024
+    RETRIEVAL_CACHE_TTL: int = 60
+
+    # Logging pipeline
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_QUEUE_POLICY: str = "drop"  # "drop" or "block"
+    LOG_QUEUE_BLOCK_TIMEOUT: float = 0.05
+    LOG_BATCH_SIZE: int = 100
+    LOG_SAMPLE_RATES: Dict[str, float] = {"DEBUG": 0.1}
+    LOG_SHIP_INTERVAL: int = 5
+    LOG_SHIP_BATCH_SIZE: int = 1000
+
+    # Components created at startup instead of on first use
+    WARM_COMPONENTS: List[str] = ["chat_graph", "tokenizers", "s3_client", "cloudwatch_logs"]
+
+    # Backpressure for /chat: per-user token buckets and a global cap on
+    # concurrent graph executions with a bounded wait queue
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RATE: float = 1.0  # requests per second per user, must be > 0
+    RATE_LIMIT_BURST: float = 10.0
+    RATE_LIMIT_MAXSIZE: int = 100000
+    RATE_LIMIT_PATH: Optional[str] = None  # SQLite file shared by all workers
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 64
+    ADMISSION_MAX_QUEUE: int = 128
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+
+    # Duplicate chat turns: responses kept for Idempotency-Key retries
+    IDEMPOTENCY_TTL: int = 3600
+    IDEMPOTENCY_CACHE_MAXSIZE: int = 10000
+    IDEMPOTENCY_CACHE_PATH: Optional[str] = None
+
+    # Background jobs: long agent runs are queued in the jobs table and run
+    # by worker.py, or inside the API process when JOB_WORKER_ENABLED is set
+    JOB_WORKER_ENABLED: bool = False
+    JOB_WORKER_CONCURRENCY: int = 8
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LEASE_SECONDS: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_MAX_ATTEMPTS_LIMIT: int = 10  # highest max_attempts a client may ask for
+    JOB_RETRY_BACKOFF: float = 5.0
+    JOB_TIMEOUT: float = 600.0
+    JOB_SHUTDOWN_GRACE: float = 30.0
+
+    # Batch chat settings
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_MAX_CONCURRENCY: int = 16
+
     class Config:
         env_file = ".env"
         case_sensitive = True
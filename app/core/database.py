@@ -1,12 +1,18 @@
-from sqlalchemy import create_engine
+import time
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 from app.core.config import settings
 
 load_dotenv()
 
 DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
@@ -15,13 +21,100 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL)
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class PoolStats:
+    """Counters describing how the async connection pool is being used."""
+
+    def __init__(self):
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.acquisitions = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquisitions += 1
+        self.wait_time_total += seconds
+        self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = async_engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "connections_opened": self.connections_opened,
+            "connections_invalidated": self.connections_invalidated,
+            "acquisitions": self.acquisitions,
+            "wait_time_avg_ms": (
+                self.wait_time_total / self.acquisitions * 1000
+                if self.acquisitions
+                else 0.0
+            ),
+            "wait_time_max_ms": self.wait_time_max * 1000,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long every checkout waits.
+
+    Timing the pool itself covers every session, whether it comes from a
+    request dependency, the message writer, the job worker or a share
+    render. The wait includes opening a new connection when the pool grows.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+# Async engine used by request handlers so database I/O never blocks the loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
+@event.listens_for(async_engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.connections_opened += 1
+
+
+@event.listens_for(async_engine.sync_engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_stats.connections_invalidated += 1
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding an ``AsyncSession`` from the async pool."""
+    async with AsyncSessionLocal() as session:
+        yield session
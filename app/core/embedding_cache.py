@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.cache import SQLiteCache, TieredCache, TTLCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, whitespace collapsed, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of an embeddings model.
+
+    Entries are keyed by a hash of the normalized text and the model name, so
+    a chunk that differs only in whitespace or Unicode form is embedded once
+    per model, across uploads and, with ``path``, across restarts. The memory
+    tier is an LRU of ``maxsize`` vectors; the optional SQLite tier keeps
+    every vector. Texts repeated within one request are sent once. Vectors are
+    stored and returned as float32 so a text gets the same vector whether or
+    not it was cached.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: Optional[str] = None,
+        maxsize: int = 10000,
+        path: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.cache = TieredCache(
+            TTLCache(maxsize=maxsize),
+            SQLiteCache(path, table="embeddings") if path else None,
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{normalize_text(text)}".encode()).hexdigest()
+
+    @staticmethod
+    def _pack(vector) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _unpack(value: bytes) -> List[float]:
+        return np.frombuffer(value, dtype=np.float32).tolist()
+
+    def _plan(self, texts: List[str], found: Dict[str, bytes], keys: List[str]) -> Dict[str, str]:
+        """Count hits and return the distinct texts to embed, by key."""
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return missing
+
+    def _memory_lookup(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self.cache.memory.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = self._plan(texts, found, keys)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = {key: self._pack(vector) for key, vector in zip(missing, vectors)}
+            self.cache.set_many(fresh)
+            found.update(fresh)
+        return [self._unpack(found[key]) for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self._memory_lookup(keys)
+        if self.cache.disk is not None and len(found) < len(keys):
+            from_disk = await asyncio.to_thread(
+                self.cache.disk.get_many, [key for key in keys if key not in found]
+            )
+            for key, value in from_disk.items():
+                self.cache.memory.set(key, value)
+            found.update(from_disk)
+        missing = self._plan(texts, found, keys)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            fresh = {key: self._pack(vector) for key, vector in zip(missing, vectors)}
+            if self.cache.disk is not None:
+                await asyncio.to_thread(self.cache.set_many, fresh)
+            else:
+                self.cache.set_many(fresh)
+            found.update(fresh)
+        return [self._unpack(found[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "tiers": self.cache.stats(),
+        }
@@ -1,40 +1,270 @@
+import atexit
 import logging
 import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
 from pythonjsonlogger import jsonlogger
-import watchtower
-import boto3
+
+from app.core.config import settings
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records for levels given a sample rate below 1."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread through a bounded queue.
+
+    When the queue is full the ``drop`` policy discards the record at once,
+    while ``block`` waits up to ``block_timeout`` seconds before dropping it.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop", block_timeout: float = 0.05):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so only resolve the message
+        # arguments here; formatting happens on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """Stream handler that writes a whole batch of records with one write."""
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = [
+            self.format(record)
+            for record in records
+            if record.levelno >= self.level and self.filter(record)
+        ]
+        if not lines:
+            return
+        with self.lock:
+            try:
+                self.stream.write(self.terminator.join(lines) + self.terminator)
+                self.flush()
+            except Exception:
+                self.handleError(records[-1])
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    Queue listener that drains records in batches.
+
+    Handlers with a ``handle_batch`` method receive up to ``batch_size``
+    records at once; others get them one by one.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers, batch_size: int = 100):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self) -> None:
+        # Block rather than fail when the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+    def _monitor(self) -> None:
+        q = self.queue
+        stopping = False
+        while not stopping:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            taken = len(batch)
+            # Records can be queued after the sentinel, so it may sit anywhere
+            records = [record for record in batch if record is not self._sentinel]
+            stopping = len(records) < taken
+            self._dispatch(records)
+            for _ in range(taken):
+                q.task_done()
+
+    def _dispatch(self, records: List[logging.LogRecord]) -> None:
+        if not records:
+            return
+        for handler in self.handlers:
+            if hasattr(handler, "handle_batch"):
+                handler.handle_batch(records)
+            else:
+                for record in records:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
 
 
 class CloudWatchLogger:
-    def __init__(self, log_group, log_stream, aws_region="us-east-1"):
-        self.logger = logging.getLogger(__name__)
+    """
+    Application logger backed by a background logging thread.
+
+    Request code only runs the sampling filter and a non-blocking put onto a
+    bounded queue. JSON formatting, console output and CloudWatch shipping
+    happen on the listener thread. Creating more than one instance for the
+    same logger reuses the existing pipeline instead of adding handlers.
+    ``shutdown`` stops the pipeline and ``start`` brings it back, for
+    processes that run the app's lifespan more than once.
+    """
+
+    _lock = threading.Lock()
+    _instances: Dict[str, "CloudWatchLogger"] = {}
+
+    def __new__(cls, log_group, log_stream, aws_region="us-east-1", name=__name__):
+        with cls._lock:
+            if name not in cls._instances:
+                instance = super().__new__(cls)
+                instance._setup(log_group, log_stream, aws_region, name)
+                cls._instances[name] = instance
+            return cls._instances[name]
+
+    def __init__(self, log_group, log_stream, aws_region="us-east-1", name=__name__):
+        pass
+
+    def _setup(self, log_group, log_stream, aws_region, name):
+        self.log_group = log_group
+        self.log_stream = log_stream
+        self.aws_region = aws_region
+        self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
 
         # Create formatter
-        formatter = jsonlogger.JsonFormatter(
+        self.formatter = jsonlogger.JsonFormatter(
             "%(asctime)s %(levelname)s %(name)s %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
 
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-
-        # CloudWatch handler if AWS credentials are available
-        if all(k in os.environ for k in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY")):
-            boto3_client = boto3.client("logs", region_name=aws_region)
-            cw_handler = watchtower.CloudWatchLogHandler(
-                log_group=log_group,
-                log_stream_name=log_stream,
-                boto3_client=boto3_client,
-            )
-            cw_handler.setFormatter(formatter)
-            self.logger.addHandler(cw_handler)
+        self.queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.queue_handler = BoundedQueueHandler(
+            self.queue,
+            policy=settings.LOG_QUEUE_POLICY,
+            block_timeout=settings.LOG_QUEUE_BLOCK_TIMEOUT,
+        )
+        self.sampler = SamplingFilter(settings.LOG_SAMPLE_RATES)
+        self.queue_handler.addFilter(self.sampler)
+
+        self.listener: Optional[BatchingQueueListener] = None
+        self.cloudwatch_attached = False
+        self.start()
+
+    def start(self) -> None:
+        """
+        Install the queue handler and start the listener thread.
+
+        Does nothing while the pipeline is running. After ``shutdown`` it
+        builds fresh handlers, since shutdown closed the old ones, and
+        re-attaches CloudWatch if it was attached before.
+        """
+        if self.listener is not None:
+            return
+        # Console handler, run on the listener thread
+        console_handler = BatchStreamHandler(sys.stderr)
+        console_handler.setFormatter(self.formatter)
+        self.listener = BatchingQueueListener(
+            self.queue, console_handler, batch_size=settings.LOG_BATCH_SIZE
+        )
+        self.listener.start()
+        if self.queue_handler not in self.logger.handlers:
+            self.logger.addHandler(self.queue_handler)
+        if self.cloudwatch_attached:
+            self.attach_cloudwatch()
+
+    def attach_cloudwatch(self):
+        """
+        Add the CloudWatch handler if AWS credentials are available.
+
+        Creating the boto3 client is deferred to this call so importing the
+        logger never touches the network; the app attaches it at startup.
+        watchtower ships records to CloudWatch in batches on its own thread.
+        """
+        if not all(k in os.environ for k in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY")):
+            return None
+
+        import boto3
+        import watchtower
+
+        boto3_client = boto3.client("logs", region_name=self.aws_region)
+        cw_handler = watchtower.CloudWatchLogHandler(
+            log_group=self.log_group,
+            log_stream_name=self.log_stream,
+            boto3_client=boto3_client,
+            send_interval=settings.LOG_SHIP_INTERVAL,
+            max_batch_count=settings.LOG_SHIP_BATCH_SIZE,
+        )
+        cw_handler.setFormatter(self.formatter)
+        self.listener.handlers = self.listener.handlers + (cw_handler,)
+        self.cloudwatch_attached = True
+        return cw_handler
+
+    def shutdown(self) -> None:
+        """Drain the queue and flush and close every handler."""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.flush()
+            handler.close()
+        self.listener = None
+        self.logger.removeHandler(self.queue_handler)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.queue_handler.dropped,
+            "sampled_out": self.sampler.sampled_out,
+        }
 
     def get_logger(self):
         return self.logger
 
 
 # Initialize logger
-logger = CloudWatchLogger(log_group="AgenticAI", log_stream="app-logs").get_logger()
+cloudwatch_logger = CloudWatchLogger(log_group="AgenticAI", log_stream="app-logs")
+logger = cloudwatch_logger.get_logger()
+
+
+def attach_cloudwatch_handler():
+    return cloudwatch_logger.attach_cloudwatch()
+
+
+def start_logging() -> None:
+    cloudwatch_logger.start()
+
+
+def shutdown_logging() -> None:
+    cloudwatch_logger.shutdown()
+
+
+atexit.register(shutdown_logging)
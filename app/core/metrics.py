@@ -0,0 +1,149 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Application metrics are kept apart from the default process collectors
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+NODE_LATENCY = Histogram(
+    "agent_node_latency_seconds",
+    "Time spent in a graph node",
+    ["graph", "node"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+NODE_ERRORS = Counter(
+    "agent_node_errors_total",
+    "Graph node executions that raised",
+    ["graph", "node"],
+    registry=REGISTRY,
+)
+HTTP_LATENCY = Histogram(
+    "http_request_latency_seconds",
+    "Time to fully serve an HTTP request",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+LLM_LATENCY = Histogram(
+    "llm_call_latency_seconds",
+    "Time per LLM call attempt",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by LLM responses",
+    ["model", "type"],
+    registry=REGISTRY,
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "LLM call attempts that failed",
+    ["model", "error"],
+    registry=REGISTRY,
+)
+REQUESTS_REJECTED = Counter(
+    "http_requests_rejected_total",
+    "Requests turned away by rate limiting or admission control",
+    ["reason"],
+    registry=REGISTRY,
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Graph executions currently admitted",
+    registry=REGISTRY,
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Requests waiting for an execution slot",
+    registry=REGISTRY,
+)
+
+# Node timings of the request being served, when a collector is active
+_request_timings: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[List[Dict[str, Any]]]:
+    """Collect the timing of every instrumented node run inside the block."""
+    timings: List[Dict[str, Any]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def record_node(graph: str, node: str, seconds: float, failed: bool = False) -> None:
+    NODE_LATENCY.labels(graph, node).observe(seconds)
+    if failed:
+        NODE_ERRORS.labels(graph, node).inc()
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append({"node": node, "ms": round(seconds * 1000, 3)})
+
+
+def record_llm_call(model: str, seconds: float, message: Any = None, error: Optional[BaseException] = None) -> None:
+    LLM_LATENCY.labels(model).observe(seconds)
+    if error is not None:
+        LLM_ERRORS.labels(model, type(error).__name__).inc()
+        return
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.labels(model, "input").inc(usage["input_tokens"])
+    if usage.get("output_tokens"):
+        LLM_TOKENS.labels(model, "output").inc(usage["output_tokens"])
+
+
+# Route label for requests that matched no route, e.g. 404s for random paths
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_template(scope) -> str:
+    """
+    Return the matched route's path template.
+
+    Routing sets ``scope["route"]`` once a route matches, and routes added
+    through ``include_router`` already carry the router prefix in ``path``.
+    """
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    return route.path
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template keeps label cardinality bounded
+            HTTP_LATENCY.labels(scope["method"], _route_template(scope), str(status)).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,309 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, REQUESTS_REJECTED
+
+
+class RateLimited(Exception):
+    """The caller has used up its token bucket; retry after ``retry_after`` seconds."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {key}")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class Overloaded(Exception):
+    """No execution slot became free in time; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBuckets:
+    """
+    Token buckets held in this process.
+
+    Idle buckets are evicted least-recently-used first once ``maxsize`` keys
+    are tracked; an evicted key simply starts again with a full bucket.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens, returning 0 on success or the seconds until they are available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = _refill(tokens, updated, now, rate, burst)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def refund(self, key: str, burst: float, cost: float = 1.0) -> None:
+        """Give back ``cost`` tokens taken from ``key``, never beyond ``burst``."""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(burst, tokens + cost), updated)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """
+    Token buckets in a local SQLite file, shared by every worker process on
+    the host so a user's limit holds whichever worker serves them.
+
+    Each take is one ``BEGIN IMMEDIATE`` transaction, so concurrent workers
+    serialize on the bucket row. Calls block on disk I/O; async code should
+    run them in a thread.
+    """
+
+    def __init__(self, path: str, table: str = "rate_limits"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=1000")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens, returning 0 on success or the seconds until they are available."""
+        # Wall-clock time, since the timestamps are compared across processes
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT tokens, updated_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = _refill(*row, now, rate, burst) if row else burst
+                wait = 0.0
+                if tokens >= cost:
+                    tokens -= cost
+                else:
+                    wait = (cost - tokens) / rate
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def refund(self, key: str, burst: float, cost: float = 1.0) -> None:
+        """Give back ``cost`` tokens taken from ``key``, never beyond ``burst``."""
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE {self.table} SET tokens = MIN(?, tokens + ?) WHERE key = ?",
+                (burst, cost, key),
+            )
+
+    def prune(self, idle: float) -> None:
+        """Drop buckets untouched for ``idle`` seconds; they would be full again anyway."""
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE updated_at < ?", (time.time() - idle,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """
+    Per-key token-bucket rate limiting.
+
+    Every key may make ``burst`` requests at once and then ``rate`` requests
+    per second. Buckets live in this process, or in the SQLite file at
+    ``path`` when one is given so the limit is shared across workers.
+
+    Args:
+        rate: Tokens added to each bucket per second
+        burst: Bucket capacity
+        maxsize: In-process buckets kept before the idlest are evicted
+        path: Optional SQLite file holding the buckets for all workers
+    """
+
+    def __init__(
+        self,
+        rate: float = settings.RATE_LIMIT_RATE,
+        burst: float = settings.RATE_LIMIT_BURST,
+        maxsize: int = settings.RATE_LIMIT_MAXSIZE,
+        path: Optional[str] = settings.RATE_LIMIT_PATH,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.shared = path is not None
+        self.buckets = SQLiteBuckets(path) if path else MemoryBuckets(maxsize)
+        self.rejected = 0
+
+    async def check(self, key: str, cost: float = 1.0) -> None:
+        """
+        Take ``cost`` tokens from ``key``'s bucket.
+
+        Raises:
+            RateLimited: The bucket does not hold ``cost`` tokens
+        """
+        if self.shared:
+            wait = await asyncio.to_thread(self.buckets.take, key, self.rate, self.burst, cost)
+        else:
+            wait = self.buckets.take(key, self.rate, self.burst, cost)
+        if wait > 0:
+            self.rejected += 1
+            REQUESTS_REJECTED.labels("rate_limited").inc()
+            raise RateLimited(key, wait)
+
+    async def refund(self, key: str, cost: float = 1.0) -> None:
+        """Return ``cost`` tokens taken by ``check`` for work that was then not done."""
+        if self.shared:
+            await asyncio.to_thread(self.buckets.refund, key, self.burst, cost)
+        else:
+            self.buckets.refund(key, self.burst, cost)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "backend": "sqlite" if self.shared else "memory",
+            "tracked_keys": None if self.shared else len(self.buckets),
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """
+    Global cap on concurrent graph executions with a bounded wait queue.
+
+    At most ``max_in_flight`` requests run at once and at most ``max_queue``
+    wait for a slot. A request arriving to a full queue is shed at once, and
+    one still queued after ``queue_timeout`` seconds gives up, so under a
+    burst the requests that are admitted keep their normal latency instead of
+    all slowing down together.
+
+    The ``Retry-After`` hint is the time the current backlog needs to drain,
+    estimated from a moving average of execution time.
+
+    A semaphore binds to the loop that first waits on it, so each event loop
+    (the server's, a worker's, a test's) gets its own ``max_in_flight``
+    slots; ``acquire`` and ``release`` must run on that loop.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = settings.ADMISSION_MAX_QUEUE,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.avg_seconds = 1.0
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Return the running loop's slot semaphore, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    def retry_after(self) -> int:
+        backlog = (self.queued + 1) / self.max_in_flight
+        return max(1, math.ceil(backlog * self.avg_seconds))
+
+    async def acquire(self) -> float:
+        """
+        Wait for an execution slot.
+
+        Returns:
+            The time the slot was granted, to be passed to ``release``
+
+        Raises:
+            Overloaded: The queue is full or the wait exceeded ``queue_timeout``
+        """
+        semaphore = self._semaphore()
+        if not semaphore.locked():
+            # A free slot is taken without suspending, so a burst arriving in
+            # one loop iteration cannot all slip past the in-flight count
+            await semaphore.acquire()
+        elif self.queued >= self.max_queue:
+            self.shed += 1
+            REQUESTS_REJECTED.labels("queue_full").inc()
+            raise Overloaded("queue full", self.retry_after())
+        else:
+            self.queued += 1
+            ADMISSION_QUEUED.inc()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                REQUESTS_REJECTED.labels("queue_timeout").inc()
+                raise Overloaded("queue timeout", self.retry_after())
+            finally:
+                self.queued -= 1
+                ADMISSION_QUEUED.dec()
+
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.inc()
+        return time.perf_counter()
+
+    def release(self, started: float) -> None:
+        self.avg_seconds += 0.1 * ((time.perf_counter() - started) - self.avg_seconds)
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec()
+        self._semaphore().release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_seconds": round(self.avg_seconds, 4),
+        }
+
+
+rate_limiter = RateLimiter()
+admission = AdmissionController()
@@ -0,0 +1,88 @@
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+Factory = Union[str, Callable[[], Any]]
+
+
+class Registry:
+    """
+    Process-wide components that are created on first use.
+
+    A factory is either a callable or a ``"module.path:function"`` string, so
+    heavy modules are not even imported until the component is needed. The
+    time spent creating each component, import included, is recorded for the
+    startup report.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Factory] = {}
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Factory) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        with self._lock:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._resolve(self._factories[name])()
+                self._timings[name] = time.perf_counter() - start
+            return self._instances[name]
+
+    def set(self, name: str, instance: Any) -> None:
+        """Provide an instance directly, e.g. a stub in benchmarks."""
+        with self._lock:
+            self._instances[name] = instance
+            self._timings[name] = 0.0
+
+    def reset(self, name: str) -> None:
+        """Forget an instance so the next ``get`` creates it again."""
+        with self._lock:
+            self._instances.pop(name, None)
+            self._timings.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.get(name)
+
+    def report(self) -> List[Dict[str, Any]]:
+        """List every component with whether it is loaded and its creation cost."""
+        return [
+            {
+                "name": name,
+                "loaded": name in self._instances,
+                "seconds": round(self._timings[name], 6) if name in self._timings else None,
+            }
+            for name in self._factories
+        ]
+
+    @staticmethod
+    def _resolve(factory: Factory) -> Callable[[], Any]:
+        if callable(factory):
+            return factory
+        module_name, _, attr = factory.partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+
+
+registry = Registry()
+
+registry.register("chat_graph", "app.agents.graph:build_graph_agent")
+registry.register("workflow_chain", "app.agents.workflow_agent:build_workflow")
+registry.register("workflow_llm", "app.agents.workflow_agent:create_llm")
+registry.register("router_llm", "app.agents.routing:create_router_llm")
+registry.register("summary_llm", "app.agents.history:create_summary_llm")
+registry.register("tokenizers", "app.agents.tokens:load_encodings")
+registry.register("llm_cache", "app.agents.llm_cache:build_llm_cache")
+registry.register("qdrant_client", "app.core.vectorstore:create_qdrant_client")
+registry.register("embeddings", "app.core.vectorstore:create_embeddings")
+registry.register("s3_client", "app.core.s3_bucket:create_s3_client")
+registry.register("cloudwatch_logs", "app.core.logger:attach_cloudwatch_handler")
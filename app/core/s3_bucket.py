@@ -1,10 +1,25 @@
-import boto3
 import os
+from app.core.registry import registry
 
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_REGION", "us-east-1"),
-)
 S3_BUCKET = os.getenv("S3_BUCKET_NAME")
+
+
+def create_s3_client():
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        # SigV4, so presigned URLs can sign headers such as Content-Length
+        config=Config(signature_version="s3v4"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION", "us-east-1"),
+        # Points at a local S3 stand-in (moto server, MinIO) when set
+        endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+    )
+
+
+def get_s3_client():
+    """Return the shared S3 client, creating it on first use."""
+    return registry.get("s3_client")
@@ -0,0 +1,107 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.core.registry import registry
+
+
+def create_qdrant_client():
+    from qdrant_client import AsyncQdrantClient
+
+    return AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+
+
+def create_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(
+        model=settings.EMBEDDING_MODEL, api_key=settings.OPENAI_API_KEY
+    )
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+
+    from app.core.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        embeddings,
+        model=settings.EMBEDDING_MODEL,
+        maxsize=settings.EMBEDDING_CACHE_MAXSIZE,
+        path=settings.EMBEDDING_CACHE_PATH,
+    )
+
+
+def get_qdrant_client():
+    """Return the shared async Qdrant client, creating it on first use."""
+    return registry.get("qdrant_client")
+
+
+def get_embeddings():
+    """Return the shared embedder, creating it on first use.
+
+    Ingestion and query-time search both use it, so they share its cache.
+    """
+    return registry.get("embeddings")
+
+
+def collection_name(user_id: Optional[int] = None) -> str:
+    """Collection holding a user's documents.
+
+    With ``QDRANT_COLLECTION_PER_USER`` every user gets their own collection;
+    otherwise all users share ``QDRANT_COLLECTION`` and are kept apart by the
+    indexed ``user_id`` payload field.
+    """
+    if settings.QDRANT_COLLECTION_PER_USER and user_id is not None:
+        return f"{settings.QDRANT_COLLECTION}_user_{user_id}"
+    return settings.QDRANT_COLLECTION
+
+
+def collection_config(size: int) -> dict:
+    """``create_collection`` arguments for document collections.
+
+    Original vectors stay on disk (``QDRANT_ON_DISK``) while the quantized
+    copies chosen by ``QDRANT_QUANTIZATION`` (``scalar``: int8, 4x smaller;
+    ``binary``: 1 bit, 32x smaller) are kept in RAM and used for the search,
+    with the originals only read to rescore the best candidates.
+    """
+    from qdrant_client import models
+
+    if settings.QDRANT_QUANTIZATION == "scalar":
+        quantization = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    elif settings.QDRANT_QUANTIZATION == "binary":
+        quantization = models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    else:
+        quantization = None
+
+    return {
+        "vectors_config": models.VectorParams(
+            size=size, distance=models.Distance.COSINE, on_disk=settings.QDRANT_ON_DISK
+        ),
+        "quantization_config": quantization,
+        "on_disk_payload": settings.QDRANT_ON_DISK,
+    }
+
+
+async def ensure_collection(client, name: str, size: int) -> None:
+    """Create a document collection and its ``user_id`` index if missing.
+
+    The index is checked separately, so a collection created before it
+    existed (or by other code) gets it too.
+    """
+    from qdrant_client import models
+
+    if not await client.collection_exists(name):
+        await client.create_collection(name, **collection_config(size))
+    elif "user_id" in (await client.get_collection(name)).payload_schema:
+        return
+    await client.create_payload_index(
+        name,
+        field_name="user_id",
+        field_schema=models.IntegerIndexParams(
+            type=models.IntegerIndexType.INTEGER, lookup=True, range=False
+        ),
+    )
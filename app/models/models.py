@@ -1,6 +1,7 @@
 from sqlalchemy import (
     Column,
     Integer,
+    BigInteger,
     String,
     Boolean,
     Text,
@@ -55,13 +56,17 @@ class Thread(Base):
     title = Column(String(255))
     user_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, server_default=func.now())
+    # Running summary of the turns compacted out of the conversation state
+    summary = Column(Text, nullable=True)
+    summary_updated_at = Column(DateTime, nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="threads")
     messages = relationship("Message", back_populates="thread", cascade="all, delete")
     shares = relationship("Share", back_populates="thread", cascade="all, delete")
-    daily_default_threads = relationship(
-        "DailyDefaultThread", back_populates="thread", cascade="all, delete"
+
+    __table_args__ = (
+        Index("idx_threads_user_created", "user_id", "created_at", "id"),
     )
 
 
@@ -83,6 +88,10 @@ class Message(Base):
     user = relationship("User", back_populates="messages")
     thread = relationship("Thread", back_populates="messages")
 
+    __table_args__ = (
+        Index("idx_messages_thread_created", "thread_id", "created_at", "id"),
+    )
+
 
 class Share(Base):
     __tablename__ = "shares"
@@ -105,4 +114,39 @@ class UserFiles(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     file_name = Column(String(255))
     file_path = Column(String(255))
+    content_type = Column(String(255), nullable=True)
+    size = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_files_user_created", "user_id", "created_at"),
+        Index("uq_files_file_path", "file_path", unique=True),
+    )
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    kind = Column(String(64), nullable=False)
+    # queued, running, succeeded, failed or cancelled
+    status = Column(String(16), nullable=False, default="queued")
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    # Earliest time the job may be claimed; pushed back between retries
+    run_after = Column(DateTime, nullable=False)
+    worker_id = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_jobs_status_run_after", "status", "run_after"),
+        Index("idx_jobs_user_created", "user_id", "created_at"),
+    )
@@ -1,78 +1,343 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, AsyncIterator, Sequence, Optional
+import asyncio
+import time
 import uuid
 from datetime import datetime
-from app.agents.graph import graph_agent  # Import the compiled graph
+from langchain_core.messages import AIMessageChunk
+from app.core.logger import logger
+from app.core.metrics import collect_timings
+from app.core.ratelimit import AdmissionController
+from app.core.registry import registry
+from app.services.message_writer import message_writer
 
-# Import agent functions directly (not as classes)
-from app.agents.query_agent import query_agent
-from app.agents.data_agent import data_agent
-from app.agents.analysis_agent import analysis_agent
+
+def _message_content(message: Any) -> str:
+    """Return the text of a message given either as a dict or a LangChain message."""
+    if isinstance(message, dict):
+        return message.get("content", "")
+    return getattr(message, "content", "")
+
+
+def _thread_pk(thread_id: str) -> Optional[int]:
+    """Return the ``threads.id`` for a thread id, or ``None`` if it is not one."""
+    return int(thread_id) if thread_id.isdigit() else None
 
 
 class AgentService:
-    def __init__(self):
-        """Initialize the AgentService with all required agents."""
-        # No need to store agent instances as they are functions
-        pass
+    def __init__(self, graph=None, writer=None):
+        """Initialize the AgentService with the compiled agent graph."""
+        self.graph = graph or registry.get("chat_graph")
+        self.writer = writer or message_writer
 
     async def process_message(
         self,
         user_message: str,
         thread_id: str,
+        user_id: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Process a user message through the agent pipeline.
 
+        The compiled graph is the only thing that runs: routing and every agent
+        node execute exactly once per turn, and the per-node outputs are
+        collected from the graph's update stream.
+
         Args:
             user_message: The user's input message
             thread_id: Unique identifier for the conversation thread
+            user_id: Optional id of the user sending the message
 
         Returns:
             Dictionary containing the agent's response and metadata
         """
         try:
-            state = {"messages": [{"role": "user", "content": user_message}]}
-
-            query_result = query_agent(state)
-            decision = query_result.get("decision", "unknown")
-
-            if decision == "data":
-                agent_response = data_agent(state)
-                response_type = "data"
-            else:  # Default to analysis
-                agent_response = analysis_agent(state)
-                response_type = "analysis"
-
-            response_state = {
-                "messages": state["messages"]
-                + [
-                    {
-                        "role": "ai",
-                        "content": f"Processing with {response_type} agent...",
-                    },
-                    {"role": "user", "content": user_message},
-                ]
-            }
-            try:
-                result = await graph_agent.ainvoke(response_state)
-            except Exception as e:
-                error_msg = f"Error processing message: {str(e)}"
-            final_message = result.get("messages", [{}])[-1].get(
-                "content", "No response generated"
-            )
-
-            return {
-                "response_id": str(uuid.uuid4()),
-                "message": final_message,
-                "timestamp": datetime.utcnow().isoformat(),
-                "metadata": {
-                    "thread_id": thread_id,
-                    # Add any additional metadata from the graph execution
-                },
-            }
+            response: Dict[str, Any] = {}
+            async for event in self._run(user_message, thread_id, user_id):
+                if event["event"] == "done":
+                    response = event["data"]
+            return response
 
         except Exception as e:
             # Log the error and re-raise with more context
             error_msg = f"Error processing message: {str(e)}"
             print(error_msg)
             raise Exception(error_msg) from e
+
+    async def stream_message(
+        self,
+        user_message: str,
+        thread_id: str,
+        user_id: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message and yield progress events as they happen.
+
+        Events are dictionaries with an ``event`` name and a ``data`` payload:
+
+        - ``node``: a graph node finished; ``data`` matches an entry of
+          ``metadata["nodes"]`` in the final response
+        - ``token``: a token delta from an LLM-backed node
+        - ``done``: the final response, identical to ``process_message``
+
+        Args:
+            user_message: The user's input message
+            thread_id: Unique identifier for the conversation thread
+            user_id: Optional id of the user sending the message
+
+        Yields:
+            Event dictionaries in execution order
+        """
+        async for event in self._run(
+            user_message, thread_id, user_id, stream_tokens=True
+        ):
+            yield event
+
+    async def process_batch(
+        self,
+        items: Sequence[Dict[str, Any]],
+        concurrency: int = 8,
+        admission: Optional[AdmissionController] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process many chat turns with at most ``concurrency`` running at once.
+
+        Args:
+            items: Dictionaries with ``message``, ``thread_id`` and optional
+                ``user_id`` keys
+            concurrency: Maximum number of graph executions in flight
+            admission: Optional controller each item takes a slot from
+
+        Returns:
+            One result per item, in input order (see ``iter_batch``)
+        """
+        results: List[Dict[str, Any]] = [{} for _ in items]
+        async for result in self.iter_batch(items, concurrency, admission):
+            results[result["index"]] = result
+        return results
+
+    async def iter_batch(
+        self,
+        items: Sequence[Dict[str, Any]],
+        concurrency: int = 8,
+        admission: Optional[AdmissionController] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process many chat turns, yielding each result as soon as it completes.
+
+        A fixed pool of ``concurrency`` workers pulls items in order, so the
+        number of in-flight graph executions never exceeds the cap. With an
+        ``admission`` controller every item also holds one of its slots while
+        it runs, so batch turns count against the same global cap as single
+        ones. A failing or shed item produces an error result instead of
+        aborting the batch.
+
+        Args:
+            items: Dictionaries with ``message``, ``thread_id`` and optional
+                ``user_id`` keys
+            concurrency: Maximum number of graph executions in flight
+            admission: Optional controller each item takes a slot from
+
+        Yields:
+            ``{"index", "status": "ok", "response"}`` or
+            ``{"index", "status": "error", "error"}`` in completion order
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            pending.put_nowait((index, item))
+        done: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    index, item = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    started = await admission.acquire() if admission is not None else None
+                    try:
+                        response = await self.process_message(
+                            user_message=item["message"],
+                            thread_id=item["thread_id"],
+                            user_id=item.get("user_id"),
+                        )
+                    finally:
+                        if started is not None:
+                            admission.release(started)
+                    await done.put({"index": index, "status": "ok", "response": response})
+                except Exception as e:
+                    await done.put({"index": index, "status": "error", "error": str(e)})
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(max(1, min(concurrency, len(items))))
+        ]
+        try:
+            for _ in range(len(items)):
+                yield await done.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _run(
+        self,
+        user_message: str,
+        thread_id: str,
+        user_id: Optional[int] = None,
+        stream_tokens: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run the graph once, yielding node, token and final ``done`` events."""
+        # Only the new message is sent; earlier turns come from the checkpoint.
+        # The per-turn keys are reset so a checkpointed thread never reports
+        # the previous turn's routing or results.
+        state = {
+            "messages": [{"role": "user", "content": user_message}],
+            "user_id": user_id,
+            "decision": "unknown",
+            "intents": [],
+            "results": None,
+            "result": "",
+        }
+        config = {"configurable": {"thread_id": thread_id}}
+        stored_summary = await self._stored_summary(thread_id, config)
+        if stored_summary:
+            state["summary"] = stored_summary
+        stream_mode = ["updates", "values"]
+        if stream_tokens:
+            stream_mode.append("messages")
+
+        nodes: List[Dict[str, Any]] = []
+        result: Dict[str, Any] = {}
+        summary: Optional[str] = None
+        start = time.perf_counter()
+        with collect_timings() as timings:
+            async for mode, chunk in self.graph.astream(
+                state, config=config, stream_mode=stream_mode
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if isinstance(message, AIMessageChunk) and message.content:
+                        yield {
+                            "event": "token",
+                            "data": {
+                                "node": metadata.get("langgraph_node"),
+                                "delta": message.content,
+                            },
+                        }
+                elif mode == "updates":
+                    for node, update in chunk.items():
+                        if update and "summary" in update:
+                            summary = update["summary"]
+                        output = self._node_output(node, update)
+                        nodes.append(output)
+                        yield {"event": "node", "data": output}
+                else:
+                    result = chunk
+
+        response = self._build_response(result, nodes, thread_id)
+        response["metadata"]["timings"] = {
+            "total_ms": round((time.perf_counter() - start) * 1000, 3),
+            "nodes": timings,
+        }
+        # Streamed or not, the turn is written once, here, from the response
+        # the caller receives; node and token events are never persisted
+        await self._persist(thread_id, user_id, user_message, response, summary)
+        yield {"event": "done", "data": response}
+
+    async def _stored_summary(self, thread_id: str, config: Dict[str, Any]) -> Optional[str]:
+        """
+        Summary saved on the thread row, when the graph state has none.
+
+        Without a checkpointer every turn starts from an empty state, and a
+        new checkpointer starts empty for old threads, so the summary of
+        turns compacted earlier is seeded from ``threads.summary``. The
+        writer keeps the summaries it has seen, so that is read from the
+        database once per thread rather than on every turn.
+        """
+        thread_pk = _thread_pk(thread_id)
+        if thread_pk is None:
+            return None
+        if getattr(self.graph, "checkpointer", None) is not None:
+            snapshot = await self.graph.aget_state(config)
+            if snapshot.values.get("summary"):
+                return None
+        return await self.writer.summary(thread_pk)
+
+    async def _persist(
+        self,
+        thread_id: str,
+        user_id: Optional[int],
+        user_message: str,
+        response: Dict[str, Any],
+        summary: Optional[str] = None,
+    ) -> None:
+        """
+        Queue the user's message and the final reply, and a new summary if
+        history was compacted.
+
+        The bot row is the final response's ``message``, the same text the
+        ``done`` event carries, so it is written once per turn however many
+        nodes replied along the way.
+        """
+        thread_pk = _thread_pk(thread_id)
+        if thread_pk is None:
+            return
+        if not await self.writer.accepts(thread_pk, user_id):
+            # Rows for a missing thread or user would only be rejected later
+            logger.warning(
+                "Turn not persisted: unknown thread or user",
+                extra={"thread_id": thread_pk, "user_id": user_id},
+            )
+            return
+        if summary is not None:
+            self.writer.set_summary(thread_pk, summary)
+        await self.writer.enqueue(
+            {
+                "thread_id": thread_pk,
+                "user_id": user_id,
+                "content": user_message,
+                "is_bot": False,
+            },
+            {
+                "thread_id": thread_pk,
+                "user_id": user_id,
+                "content": response["message"],
+                "is_bot": True,
+            },
+        )
+
+    @staticmethod
+    def _build_response(
+        result: Dict[str, Any], nodes: List[Dict[str, Any]], thread_id: str
+    ) -> Dict[str, Any]:
+        """Build the chat response from the final graph state."""
+        messages = result.get("messages") or []
+        final_message = (
+            _message_content(messages[-1]) if messages else "No response generated"
+        )
+
+        return {
+            "response_id": str(uuid.uuid4()),
+            "message": final_message,
+            "timestamp": datetime.utcnow().isoformat(),
+            "metadata": {
+                "thread_id": thread_id,
+                "decision": result.get("decision", "unknown"),
+                "intents": result.get("intents", []),
+                "nodes": nodes,
+            },
+        }
+
+    @staticmethod
+    def _node_output(node: str, update: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize a single node update for the response metadata."""
+        update = update or {}
+        messages = update.get("messages") or []
+        output = {
+            "node": node,
+            "content": _message_content(messages[-1]) if messages else None,
+        }
+        for key in ("decision", "intents", "result"):
+            if key in update:
+                output[key] = update[key]
+        return output
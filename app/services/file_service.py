@@ -0,0 +1,333 @@
+import asyncio
+import math
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.s3_bucket import S3_BUCKET, get_s3_client
+from app.models.models import UserFiles
+
+# S3 rejects multipart uploads with more parts than this
+MAX_PARTS = 10000
+
+# Object metadata holding the size given to presign_upload
+DECLARED_SIZE = "declared-size"
+
+
+def content_disposition(file_name: str) -> str:
+    """
+    ``attachment`` Content-Disposition for ``file_name`` (RFC 6266).
+
+    ``filename*`` carries the name UTF-8 percent-encoded; ``filename`` is an
+    ASCII fallback with quotes, backslashes and control characters replaced.
+    """
+    fallback = "".join(
+        char if " " <= char <= "~" and char not in '"\\' else "_" for char in file_name
+    )
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name, safe='')}"
+
+
+class FileNotFound(Exception):
+    """Raised when a file does not exist or belongs to another user."""
+
+
+class UploadRejected(Exception):
+    """Raised when an uploaded object fails the size checks; it has been deleted."""
+
+
+class FileService:
+    """
+    Presigned direct-to-S3 uploads and downloads.
+
+    Clients upload straight to the bucket with presigned PUT or multipart part
+    URLs and then call ``complete_upload``, which verifies the object and
+    records it in ``UserFiles``. Download URLs are cached for a little less
+    than their lifetime, so repeated reads of the same file reuse one URL.
+    """
+
+    def __init__(self, s3_client=None, bucket: Optional[str] = None):
+        self._s3_client = s3_client
+        self.bucket = bucket or S3_BUCKET
+        self.download_urls = TTLCache(
+            maxsize=4096, ttl=settings.S3_DOWNLOAD_URL_CACHE_TTL
+        )
+
+    @property
+    def s3_client(self):
+        return self._s3_client or get_s3_client()
+
+    @staticmethod
+    def key_prefix(user_id: int) -> str:
+        return f"uploads/{user_id}/"
+
+    async def presign_upload(
+        self,
+        user_id: int,
+        file_name: str,
+        size: int,
+        content_type: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Issue URLs for uploading a file directly to S3.
+
+        Files up to ``S3_UPLOAD_PART_SIZE`` get a single presigned PUT; larger
+        files get a multipart upload with one presigned URL per part. Each part
+        except the last must be exactly ``part_size`` bytes, and the client
+        passes the returned ``ETag`` of every part to ``complete_upload``.
+        Every URL has its ``Content-Length`` signed in, so S3 refuses bodies
+        of any other size, and the declared size is stored on the object for
+        ``complete_upload`` to check. The single PUT must send the returned
+        ``headers`` unchanged.
+
+        Args:
+            user_id: Owner of the file
+            file_name: Original file name, used for the key extension
+            size: Size of the file in bytes
+            content_type: Content type the client will send
+
+        Returns:
+            Dictionary with the object ``key`` and either ``url`` or
+            ``upload_id``/``part_size``/``parts``
+        """
+        if size > settings.S3_UPLOAD_MAX_SIZE:
+            raise ValueError(
+                f"File exceeds the limit of {settings.S3_UPLOAD_MAX_SIZE} bytes"
+            )
+
+        key = f"{self.key_prefix(user_id)}{uuid.uuid4()}{os.path.splitext(file_name)[1]}"
+        content_type = content_type or "application/octet-stream"
+        expires_in = settings.S3_PRESIGN_EXPIRES
+        part_size = max(settings.S3_UPLOAD_PART_SIZE, math.ceil(size / MAX_PARTS))
+
+        if size <= part_size:
+            url = await asyncio.to_thread(
+                self.s3_client.generate_presigned_url,
+                "put_object",
+                Params={
+                    "Bucket": self.bucket,
+                    "Key": key,
+                    "ContentType": content_type,
+                    "ContentLength": size,
+                    "Metadata": {DECLARED_SIZE: str(size)},
+                },
+                ExpiresIn=expires_in,
+            )
+            return {
+                "key": key,
+                "method": "PUT",
+                "url": url,
+                "headers": {
+                    "Content-Type": content_type,
+                    "Content-Length": str(size),
+                    f"x-amz-meta-{DECLARED_SIZE}": str(size),
+                },
+                "expires_in": expires_in,
+            }
+
+        return await asyncio.to_thread(
+            self._presign_multipart, key, content_type, size, part_size, expires_in
+        )
+
+    def _presign_multipart(
+        self, key: str, content_type: str, size: int, part_size: int, expires_in: int
+    ) -> Dict[str, Any]:
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type,
+            Metadata={DECLARED_SIZE: str(size)},
+        )["UploadId"]
+        count = math.ceil(size / part_size)
+        parts = [
+            {
+                "part_number": part_number,
+                "url": self.s3_client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": self.bucket,
+                        "Key": key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                        "ContentLength": (
+                            part_size if part_number < count else size - part_size * (count - 1)
+                        ),
+                    },
+                    ExpiresIn=expires_in,
+                ),
+            }
+            for part_number in range(1, count + 1)
+        ]
+        return {
+            "key": key,
+            "method": "PUT",
+            "upload_id": upload_id,
+            "part_size": part_size,
+            "parts": parts,
+            "expires_in": expires_in,
+        }
+
+    async def complete_upload(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        key: str,
+        file_name: str,
+        upload_id: Optional[str] = None,
+        parts: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Finish a direct upload and record the object in ``UserFiles``.
+
+        The object's size must match the size given to ``presign_upload`` and
+        stay within ``S3_UPLOAD_MAX_SIZE``; otherwise it is deleted. Calling
+        this again for a key that is already recorded returns that record.
+
+        Args:
+            session: Database session
+            user_id: Owner of the file; must match the key issued by ``presign_upload``
+            key: Object key returned by ``presign_upload``
+            file_name: Original file name to store
+            upload_id: Multipart upload id, for multipart uploads
+            parts: ``{"part_number", "etag"}`` for every part, for multipart uploads
+
+        Returns:
+            The stored file record, and whether this call created it
+
+        Raises:
+            FileNotFound: The key was not issued to ``user_id`` or has no object
+            UploadRejected: The object's size is wrong; it has been deleted
+        """
+        if not key.startswith(self.key_prefix(user_id)):
+            raise FileNotFound(key)
+
+        existing = await self._recorded(session, key)
+        if existing is not None:
+            return existing, False
+
+        if upload_id:
+            try:
+                await asyncio.to_thread(
+                    self.s3_client.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={
+                        "Parts": [
+                            {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                            for part in sorted(parts or [], key=lambda p: p["part_number"])
+                        ]
+                    },
+                )
+            except ClientError as e:
+                # Already completed by an earlier call that failed to record it
+                if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                    raise
+
+        try:
+            head = await asyncio.to_thread(
+                self.s3_client.head_object, Bucket=self.bucket, Key=key
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFound(key)
+            raise
+
+        size = head["ContentLength"]
+        declared = head.get("Metadata", {}).get(DECLARED_SIZE)
+        if size > settings.S3_UPLOAD_MAX_SIZE or declared != str(size):
+            await asyncio.to_thread(self.s3_client.delete_object, Bucket=self.bucket, Key=key)
+            raise UploadRejected(
+                f"Uploaded {size} bytes, declared {declared}, "
+                f"limit {settings.S3_UPLOAD_MAX_SIZE}"
+            )
+
+        record = {
+            "user_id": user_id,
+            "file_name": file_name,
+            "file_path": key,
+            "content_type": head.get("ContentType"),
+            "size": size,
+        }
+        try:
+            file_id = (
+                await session.execute(insert(UserFiles).values(**record).returning(UserFiles.id))
+            ).scalar_one()
+            await session.commit()
+        except IntegrityError:
+            # A concurrent call recorded the key first
+            await session.rollback()
+            return await self._recorded(session, key), False
+        return {"id": file_id, **record}, True
+
+    @staticmethod
+    async def _recorded(session: AsyncSession, key: str) -> Optional[Dict[str, Any]]:
+        """Return the ``UserFiles`` record for ``key``, if it was already completed."""
+        row = (
+            await session.execute(
+                select(
+                    UserFiles.id,
+                    UserFiles.user_id,
+                    UserFiles.file_name,
+                    UserFiles.file_path,
+                    UserFiles.content_type,
+                    UserFiles.size,
+                ).where(UserFiles.file_path == key)
+            )
+        ).mappings().one_or_none()
+        return dict(row) if row is not None else None
+
+    async def presign_download(
+        self, session: AsyncSession, user_id: int, file_id: int
+    ) -> Dict[str, Any]:
+        """
+        Return a presigned GET URL for one of the user's files.
+
+        The URL accepts ``Range`` headers for partial reads. It is cached for
+        ``S3_DOWNLOAD_URL_CACHE_TTL`` seconds, which is kept below the URL's
+        lifetime so a cached URL is never handed out already expired.
+        """
+        cache_key = (user_id, file_id)
+        cached = self.download_urls.get(cache_key)
+        if cached is not None:
+            return cached
+
+        row = (
+            await session.execute(
+                select(UserFiles.file_path, UserFiles.file_name).where(
+                    UserFiles.id == file_id, UserFiles.user_id == user_id
+                )
+            )
+        ).one_or_none()
+        if row is None:
+            raise FileNotFound(file_id)
+
+        expires_in = settings.S3_PRESIGN_EXPIRES
+        url = await asyncio.to_thread(
+            self.s3_client.generate_presigned_url,
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": row.file_path,
+                "ResponseContentDisposition": content_disposition(row.file_name),
+            },
+            ExpiresIn=expires_in,
+        )
+        result = {
+            "url": url,
+            "expires_at": (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat(),
+            "supports_range": True,
+        }
+        self.download_urls.set(cache_key, result)
+        return result
+
+
+file_service = FileService()
@@ -0,0 +1,130 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Message, Thread
+from app.services.message_writer import message_writer
+
+# Columns returned for every message; the JSON columns are only read on request
+MESSAGE_COLUMNS = (
+    Message.id,
+    Message.thread_id,
+    Message.user_id,
+    Message.content,
+    Message.is_bot,
+    Message.created_at,
+)
+OPTIONAL_MESSAGE_COLUMNS = {
+    "artifact_ids": Message.artifact_ids,
+    "artifacts_query_template": Message.artifacts_query_template,
+    "suggested_questions": Message.suggested_questions,
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the keyset position of a row as an opaque cursor."""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+class HistoryService:
+    """
+    Read API for threads and messages using keyset pagination.
+
+    Pages are ordered newest first on ``(created_at, id)`` and continue from
+    the last row of the previous page, so every page is a bounded index range
+    scan regardless of how deep the client has paged.
+    """
+
+    def __init__(self, session: AsyncSession, writer=None):
+        self.session = session
+        self.writer = writer or message_writer
+
+    async def list_threads(
+        self, user_id: int, limit: int = 20, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List a user's threads, newest first.
+
+        Args:
+            user_id: Owner of the threads
+            limit: Maximum number of threads to return
+            cursor: ``next_cursor`` from the previous page, if any
+
+        Returns:
+            Dictionary with ``items`` and ``next_cursor`` (``None`` on the last page)
+        """
+        query = select(Thread.id, Thread.title, Thread.created_at).where(
+            Thread.user_id == user_id
+        )
+        if cursor:
+            query = query.where(
+                tuple_(Thread.created_at, Thread.id) < decode_cursor(cursor)
+            )
+        query = query.order_by(Thread.created_at.desc(), Thread.id.desc())
+        return await self._page(query, limit)
+
+    async def list_messages(
+        self,
+        thread_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include: Sequence[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        List a thread's messages, newest first.
+
+        Args:
+            thread_id: Thread to read
+            limit: Maximum number of messages to return
+            cursor: ``next_cursor`` from the previous page, if any
+            include: Extra columns to load, from ``OPTIONAL_MESSAGE_COLUMNS``
+
+        Returns:
+            Dictionary with ``items`` and ``next_cursor`` (``None`` on the last page)
+        """
+        unknown = set(include) - OPTIONAL_MESSAGE_COLUMNS.keys()
+        if unknown:
+            raise ValueError(f"Unknown message fields: {', '.join(sorted(unknown))}")
+
+        # Make messages still sitting in the write-behind buffer visible
+        await self.writer.flush_thread(thread_id)
+
+        columns = MESSAGE_COLUMNS + tuple(
+            OPTIONAL_MESSAGE_COLUMNS[name] for name in include
+        )
+        query = select(*columns).where(Message.thread_id == thread_id)
+        if cursor:
+            query = query.where(
+                tuple_(Message.created_at, Message.id) < decode_cursor(cursor)
+            )
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+        return await self._page(query, limit)
+
+    async def _page(self, query, limit: int) -> Dict[str, Any]:
+        """Fetch one page plus one row to tell whether another page exists."""
+        rows = (await self.session.execute(query.limit(limit + 1))).mappings().all()
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.cache import SQLiteCache, TieredCache, TTLCache
+from app.core.config import settings
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a different request."""
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash the fields that identify a request."""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Runs duplicate chat turns once.
+
+    Requests carrying the same key share a single execution: a request that
+    arrives while its twin is running waits for that run, and with
+    ``store=True`` the response is kept for ``IDEMPOTENCY_TTL`` seconds so a
+    retry after completion gets it back without running again. Stored
+    responses live in memory, optionally backed by a SQLite file shared by the
+    workers on a host.
+
+    The execution runs in its own task, so it finishes and is stored even if
+    the client that started it disconnects; its retry then finds the result.
+    Failures are never stored, so a retry after an error runs again.
+    """
+
+    def __init__(self):
+        disk = (
+            SQLiteCache(
+                settings.IDEMPOTENCY_CACHE_PATH,
+                table="idempotent_responses",
+                ttl=settings.IDEMPOTENCY_TTL,
+            )
+            if settings.IDEMPOTENCY_CACHE_PATH
+            else None
+        )
+        self.responses = TieredCache(
+            TTLCache(maxsize=settings.IDEMPOTENCY_CACHE_MAXSIZE, ttl=settings.IDEMPOTENCY_TTL),
+            disk,
+        )
+        self._inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.replayed = 0
+
+    async def run(
+        self,
+        key: str,
+        request_hash: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        store: bool = True,
+        admit: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the response for ``key``, running ``call`` only if no
+        execution for it is running or stored.
+
+        Args:
+            key: Identifies the request, e.g. the client's idempotency key
+            request_hash: Fingerprint of the request body; a key reused with a
+                different body is rejected
+            call: Produces the response when the request has to run
+            store: Keep the response for retries that arrive after it finished
+            admit: Awaited only when ``call`` is about to run, e.g. a rate-limit
+                check; an exception from it is raised and nothing runs.
+                Replays and requests joining a running twin skip it
+
+        Returns:
+            The response and whether it was shared rather than produced by
+            this call
+
+        Raises:
+            IdempotencyConflict: ``key`` belongs to a request with another body
+        """
+        if store:
+            stored = await asyncio.to_thread(self.responses.get, key)
+            if stored is not None:
+                self._check(stored[0], request_hash)
+                self.replayed += 1
+                return stored[1], True
+
+        pending = self._inflight.get(key)
+        if pending is None and admit is not None:
+            await admit()
+            # A twin may have started while admission was checked
+            pending = self._inflight.get(key)
+        if pending is not None:
+            self._check(pending[0], request_hash)
+            self.coalesced += 1
+            return await asyncio.shield(pending[1]), True
+
+        task = asyncio.create_task(self._execute(key, request_hash, call, store))
+        # Retrieve the exception even if every waiter has gone away
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = (request_hash, task)
+        self.executed += 1
+        return await asyncio.shield(task), False
+
+    async def _execute(
+        self,
+        key: str,
+        request_hash: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        store: bool,
+    ) -> Dict[str, Any]:
+        try:
+            response = await call()
+            if store:
+                await asyncio.to_thread(self.responses.set, key, (request_hash, response))
+            return response
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _check(expected: str, request_hash: str) -> None:
+        if expected != request_hash:
+            raise IdempotencyConflict("Idempotency key was already used for a different request")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "responses": self.responses.stats(),
+        }
+
+
+def chat_key(
+    thread_id: str, message: str, user_id: Optional[int], idempotency_key: Optional[str]
+) -> Tuple[str, bool]:
+    """
+    Return the coalescing key for a chat turn and whether to store its result.
+
+    With an ``Idempotency-Key`` the key is scoped to the caller and the result
+    is stored for retries. Without one, only identical turns running at the
+    same time on a thread are merged: sending the same message again later is
+    a new turn.
+    """
+    if idempotency_key:
+        owner = f"user:{user_id}" if user_id is not None else f"thread:{thread_id}"
+        return f"idem:{owner}:{idempotency_key}", True
+    return f"turn:{thread_id}:{fingerprint(user_id, message)}", False
+
+
+idempotency_service = IdempotencyService()
@@ -0,0 +1,274 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+import uuid
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.embedding_cache import normalize_text
+from app.core.logger import logger
+from app.core.s3_bucket import S3_BUCKET, get_s3_client
+from app.core.vectorstore import (
+    collection_name,
+    ensure_collection,
+    get_embeddings,
+    get_qdrant_client,
+)
+from app.services.retrieval_service import retrieval_service
+
+TEXT_EXTENSIONS = {".txt", ".md", ".csv", ".json", ".log"}
+
+
+class UnsupportedDocument(ValueError):
+    """Raised for files the ingestion pipeline cannot read."""
+
+
+def document_kind(content_type: Optional[str], file_name: Optional[str]) -> Optional[str]:
+    """Return ``"pdf"``, ``"text"`` or None when the file cannot be ingested."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if content_type == "application/pdf" or extension == ".pdf":
+        return "pdf"
+    if (content_type or "").startswith("text/") or extension in TEXT_EXTENSIONS:
+        return "text"
+    return None
+
+
+def iter_pages(stream: BinaryIO, kind: str, page_chars: int) -> Iterator[Tuple[int, str]]:
+    """
+    Yield ``(page_number, text)`` one page at a time.
+
+    PDFs are read with ``pypdf``, which only parses the page being extracted.
+    Text files have no pages, so lines are grouped into pages of roughly
+    ``page_chars`` characters. Either way only one page is held in memory.
+
+    Text page breaks are content-defined: once a page is half full it ends
+    after the first line whose hash hits, so an edit only moves the breaks
+    next to it and the unchanged pages of a new version of a file chunk
+    exactly as before (and hit the embedding cache).
+    """
+    if kind == "pdf":
+        from pypdf import PdfReader
+
+        for number, page in enumerate(PdfReader(stream).pages, start=1):
+            yield number, page.extract_text() or ""
+        return
+
+    reader = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+    try:
+        lines: List[str] = []
+        size = 0
+        number = 0
+        for line in reader:
+            normalized = normalize_text(line)
+            lines.append(line)
+            size += len(normalized) + 1
+            boundary = size >= page_chars // 2 and zlib.crc32(normalized.encode()) % 16 == 0
+            if boundary or size >= page_chars * 2:
+                number += 1
+                yield number, "".join(lines)
+                lines, size = [], 0
+        if lines:
+            yield number + 1, "".join(lines)
+    finally:
+        # Leave the caller's stream open
+        reader.detach()
+
+
+def split_text(text: str, chunk_size: int, overlap: int) -> Iterator[str]:
+    """
+    Split ``text`` into overlapping chunks, breaking on whitespace where possible.
+
+    Whitespace is collapsed first, so reflowed copies of a document chunk
+    identically and hit the embedding cache.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("chunk overlap must be smaller than the chunk size")
+    text = normalize_text(text)
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            if space > start:
+                end = space
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Start the overlap on a word boundary too
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+
+
+async def ingest_document(
+    stream: BinaryIO,
+    source: str,
+    kind: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    client=None,
+    embeddings=None,
+    collection: Optional[str] = None,
+    chunk_size: int = settings.INGEST_CHUNK_SIZE,
+    chunk_overlap: int = settings.INGEST_CHUNK_OVERLAP,
+    batch_size: int = settings.INGEST_BATCH_SIZE,
+    embed_concurrency: int = settings.INGEST_EMBED_CONCURRENCY,
+    upsert_concurrency: int = settings.INGEST_UPSERT_CONCURRENCY,
+    queue_size: int = settings.INGEST_QUEUE_SIZE,
+) -> Dict[str, Any]:
+    """
+    Parse, chunk, embed and upsert a document into Qdrant as a streaming pipeline.
+
+    Pages are parsed in a worker thread and chunked into batches, batches are
+    embedded by ``embed_concurrency`` workers and written by
+    ``upsert_concurrency`` workers. The stages are connected by queues of
+    ``queue_size`` batches, so a slow stage holds back the ones before it and
+    memory stays bounded by the queue sizes rather than the document size.
+    Point ids are derived from the source, page and chunk, so ingesting the
+    same document again overwrites its points.
+
+    Args:
+        stream: Binary file object positioned at the start of the document
+        source: Identifier stored with each chunk, e.g. the S3 key
+        kind: ``"pdf"`` or ``"text"``, see ``document_kind``
+        metadata: Extra payload stored with every chunk (user_id, file_id, ...)
+        client: ``AsyncQdrantClient``; defaults to the shared client
+        embeddings: LangChain ``Embeddings``; defaults to the shared embedder
+        collection: Qdrant collection, created on first write if missing;
+            defaults to the collection of ``metadata["user_id"]``
+        chunk_size: Maximum characters per chunk
+        chunk_overlap: Characters shared by consecutive chunks
+        batch_size: Chunks per embedding request and per upsert
+        embed_concurrency: Embedding requests in flight
+        upsert_concurrency: Upserts in flight
+        queue_size: Batches buffered between stages
+
+    Returns:
+        Dictionary with pages, chunks, seconds, pages_per_sec and chunks_per_sec
+    """
+    from qdrant_client import models
+
+    if kind not in ("pdf", "text"):
+        raise UnsupportedDocument(source)
+    client = client or get_qdrant_client()
+    embeddings = embeddings or get_embeddings()
+    metadata = metadata or {}
+    collection = collection or collection_name(metadata.get("user_id"))
+
+    to_embed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    to_upsert: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stats = {"pages": 0, "chunks": 0}
+    collection_ready = asyncio.Lock()
+    ready = False
+
+    async def prepare_collection(size: int) -> None:
+        nonlocal ready
+        async with collection_ready:
+            if not ready:
+                await ensure_collection(client, collection, size)
+                retrieval_service.collection_created(collection)
+                ready = True
+
+    async def parse() -> None:
+        pages = iter_pages(stream, kind, settings.INGEST_TEXT_PAGE_CHARS)
+        batch: List[Dict[str, Any]] = []
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            number, text = page
+            stats["pages"] += 1
+            for index, chunk in enumerate(split_text(text, chunk_size, chunk_overlap)):
+                batch.append(
+                    {**metadata, "source": source, "page": number, "chunk": index, "text": chunk}
+                )
+                if len(batch) >= batch_size:
+                    await to_embed.put(batch)
+                    batch = []
+        if batch:
+            await to_embed.put(batch)
+        for _ in range(embed_concurrency):
+            await to_embed.put(None)
+
+    async def embed() -> None:
+        while (batch := await to_embed.get()) is not None:
+            vectors = await embeddings.aembed_documents([item["text"] for item in batch])
+            # Columnar batch: one model for the whole request instead of one per point
+            points = models.Batch(
+                ids=[
+                    str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{item['page']}:{item['chunk']}"))
+                    for item in batch
+                ],
+                vectors=vectors,
+                payloads=batch,
+            )
+            await to_upsert.put(points)
+
+    async def embed_stage() -> None:
+        await asyncio.gather(*(embed() for _ in range(embed_concurrency)))
+        for _ in range(upsert_concurrency):
+            await to_upsert.put(None)
+
+    async def upsert() -> None:
+        while (points := await to_upsert.get()) is not None:
+            await prepare_collection(len(points.vectors[0]))
+            await client.upsert(collection, points=points)
+            stats["chunks"] += len(points.ids)
+
+    start = time.perf_counter()
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(parse())
+            group.create_task(embed_stage())
+            for _ in range(upsert_concurrency):
+                group.create_task(upsert())
+    except ExceptionGroup as e:
+        # Surface the first failure; the other stages were cancelled
+        raise e.exceptions[0]
+    seconds = time.perf_counter() - start
+
+    return {
+        **stats,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(stats["pages"] / seconds, 2) if seconds else 0.0,
+        "chunks_per_sec": round(stats["chunks"] / seconds, 2) if seconds else 0.0,
+    }
+
+
+async def ingest_s3_object(
+    key: str,
+    content_type: Optional[str] = None,
+    file_name: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Ingest an uploaded S3 object; meant to run as a background task.
+
+    The object is downloaded into a spooled temporary file that moves to
+    disk beyond ``INGEST_SPOOL_SIZE`` bytes, since PDF parsing needs a
+    seekable stream. Failures are logged rather than raised.
+
+    Returns:
+        The ingestion stats, or None when the file was skipped or failed.
+    """
+    kind = document_kind(content_type, file_name or key)
+    if kind is None:
+        return None
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=settings.INGEST_SPOOL_SIZE) as spool:
+            await asyncio.to_thread(get_s3_client().download_fileobj, S3_BUCKET, key, spool)
+            spool.seek(0)
+            stats = await ingest_document(
+                spool,
+                source=key,
+                kind=kind,
+                metadata={"file_name": file_name, **(metadata or {})},
+            )
+    except Exception as e:
+        logger.error(f"Document ingestion failed: {e}", exc_info=True, extra={"s3_key": key})
+        return None
+
+    logger.info("Document ingested", extra={"s3_key": key, **stats})
+    return stats
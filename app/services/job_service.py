@@ -0,0 +1,252 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, insert, or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import Job
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+JOB_FIELDS = (
+    Job.id,
+    Job.kind,
+    Job.status,
+    Job.user_id,
+    Job.payload,
+    Job.result,
+    Job.error,
+    Job.attempts,
+    Job.max_attempts,
+    Job.cancel_requested,
+    Job.created_at,
+    Job.started_at,
+    Job.finished_at,
+)
+
+
+class JobNotFound(Exception):
+    """Raised when a job id does not exist."""
+
+
+class JobService:
+    """
+    The ``jobs`` table as a durable work queue.
+
+    The API side submits, reads and cancels jobs. Workers claim due jobs with
+    ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of worker processes
+    can poll the table without handing the same job to two of them. A claim
+    is a lease: the worker extends it with ``heartbeat`` while the job runs,
+    and a job whose lease runs out (its worker died) is claimed again.
+    Every worker-side write is conditional on the worker still holding the
+    lease, so a worker that lost its job cannot overwrite the new owner's
+    result.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        user_id: Optional[int] = None,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+    ) -> Dict[str, Any]:
+        """Queue a job and return it."""
+        now = datetime.utcnow()
+        job_id = str(uuid.uuid4())
+        async with self.session_factory() as session:
+            await session.execute(
+                insert(Job).values(
+                    id=job_id,
+                    kind=kind,
+                    status="queued",
+                    user_id=user_id,
+                    payload=payload,
+                    attempts=0,
+                    max_attempts=max_attempts,
+                    cancel_requested=False,
+                    run_after=now,
+                    created_at=now,
+                )
+            )
+            await session.commit()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        async with self.session_factory() as session:
+            row = (
+                await session.execute(select(*JOB_FIELDS).where(Job.id == job_id))
+            ).mappings().one_or_none()
+        if row is None:
+            raise JobNotFound(f"Job {job_id} not found")
+        return dict(row)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancel a job.
+
+        A queued job is cancelled at once. A running job is flagged, and its
+        worker cancels it at the next heartbeat. Finished jobs are unchanged.
+        """
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="cancelled", cancel_requested=True, finished_at=now)
+            )
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "running")
+                .values(cancel_requested=True)
+            )
+            await session.commit()
+        return await self.get(job_id)
+
+    async def claim(
+        self, worker_id: str, limit: int, lease: float = settings.JOB_LEASE_SECONDS
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to ``limit`` due jobs to ``worker_id``.
+
+        Due jobs are queued ones whose ``run_after`` has passed and running
+        ones whose lease has expired with attempts left, oldest first.
+
+        Returns:
+            The claimed jobs' id, kind, payload, attempts and max_attempts
+        """
+        now = datetime.utcnow()
+        due = (
+            select(Job.id)
+            .where(
+                or_(
+                    and_(Job.status == "queued", Job.run_after <= now),
+                    and_(
+                        Job.status == "running",
+                        Job.lease_expires_at < now,
+                        Job.attempts < Job.max_attempts,
+                    ),
+                )
+            )
+            .order_by(Job.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as session:
+            rows = (
+                await session.execute(
+                    update(Job)
+                    .where(Job.id.in_(due.scalar_subquery()))
+                    .values(
+                        status="running",
+                        worker_id=worker_id,
+                        attempts=Job.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=lease),
+                        started_at=now,
+                    )
+                    .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+                    .execution_options(synchronize_session=False)
+                )
+            ).mappings().all()
+            await session.commit()
+        return [dict(row) for row in rows]
+
+    async def heartbeat(
+        self, job_id: str, worker_id: str, lease: float = settings.JOB_LEASE_SECONDS
+    ) -> Optional[bool]:
+        """
+        Extend the lease on a running job.
+
+        Returns:
+            Whether cancellation was requested, or None if the worker no
+            longer holds the job
+        """
+        async with self.session_factory() as session:
+            cancel_requested = (
+                await session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == "running")
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease))
+                    .returning(Job.cancel_requested)
+                )
+            ).scalar_one_or_none()
+            await session.commit()
+        return cancel_requested
+
+    async def finish(
+        self,
+        job_id: str,
+        worker_id: str,
+        status: str,
+        result: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record the outcome of a job the worker still holds."""
+        await self._update_owned(
+            job_id,
+            worker_id,
+            status=status,
+            result=result,
+            error=error,
+            lease_expires_at=None,
+            finished_at=datetime.utcnow(),
+        )
+
+    async def retry(self, job_id: str, worker_id: str, error: str, delay: float) -> None:
+        """Put a failed attempt back in the queue after ``delay`` seconds."""
+        await self._update_owned(
+            job_id,
+            worker_id,
+            status="queued",
+            error=error,
+            worker_id=None,
+            lease_expires_at=None,
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+        )
+
+    async def release(self, job_id: str, worker_id: str) -> None:
+        """
+        Hand an interrupted job back, e.g. on worker shutdown, without
+        using up an attempt.
+        """
+        await self._update_owned(
+            job_id,
+            worker_id,
+            status="queued",
+            worker_id=None,
+            lease_expires_at=None,
+            attempts=Job.attempts - 1,
+            run_after=datetime.utcnow(),
+        )
+
+    async def fail_expired(self) -> int:
+        """Fail running jobs whose lease expired on their last attempt."""
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Job)
+                .where(
+                    Job.status == "running",
+                    Job.lease_expires_at < now,
+                    Job.attempts >= Job.max_attempts,
+                )
+                .values(status="failed", error="Lease expired", finished_at=now)
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def _update_owned(self, job_id: str, owner: str, **values: Any) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == owner, Job.status == "running")
+                .values(**values)
+            )
+            await session.commit()
+
+
+job_service = JobService()
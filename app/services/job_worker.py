@@ -0,0 +1,194 @@
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.agents.llm_cache import bypass_llm_cache
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.registry import registry
+from app.services.job_service import JobService, job_service
+
+
+async def run_workflow(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the joke workflow chain for ``payload["topic"]``.
+
+    ``payload["no_cache"]`` skips the LLM response cache, for callers that
+    want fresh output rather than an earlier answer to the same prompt.
+    """
+    chain = registry.get("workflow_chain")
+    if payload.get("no_cache"):
+        with bypass_llm_cache():
+            return await chain.ainvoke({"topic": payload["topic"]})
+    return await chain.ainvoke({"topic": payload["topic"]})
+
+
+async def run_chat(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one chat turn, as ``POST /chat`` would."""
+    from app.services.agent_service import AgentService
+
+    return await AgentService().process_message(
+        user_message=payload["message"],
+        thread_id=payload["thread_id"],
+        user_id=payload.get("user_id"),
+    )
+
+
+# Job kinds accepted by POST /jobs and the coroutine that runs each
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    "workflow": run_workflow,
+    "chat": run_chat,
+}
+
+
+class JobWorker:
+    """
+    Asyncio worker pool draining the ``jobs`` table.
+
+    Runs up to ``concurrency`` jobs at once. Whenever a slot is free it
+    claims due jobs, waking every ``poll_interval`` seconds or as soon as a
+    job finishes. Each job runs in its own task with a heartbeat that
+    renews its lease every third of ``lease`` seconds and cancels the job
+    when cancellation is requested or the lease was lost. A failed attempt
+    is retried after ``retry_backoff * 2 ** (attempt - 1)`` seconds until
+    ``max_attempts`` is reached; a job that runs past ``timeout`` counts as
+    failed.
+
+    On ``close`` the worker stops claiming, gives running jobs
+    ``shutdown_grace`` seconds to finish and hands the rest back to the
+    queue for another worker.
+    """
+
+    def __init__(
+        self,
+        service: Optional[JobService] = None,
+        handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]] = None,
+        concurrency: int = settings.JOB_WORKER_CONCURRENCY,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        lease: float = settings.JOB_LEASE_SECONDS,
+        retry_backoff: float = settings.JOB_RETRY_BACKOFF,
+        timeout: float = settings.JOB_TIMEOUT,
+        shutdown_grace: float = settings.JOB_SHUTDOWN_GRACE,
+    ):
+        self.service = service or job_service
+        self.handlers = handlers or JOB_HANDLERS
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.shutdown_grace = shutdown_grace
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the claim loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop claiming, let running jobs finish, then release the rest."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if not self._running:
+            return
+        _, pending = await asyncio.wait(self._running.values(), timeout=self.shutdown_grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.service.fail_expired()
+                free = self.concurrency - len(self._running)
+                if free > 0:
+                    claimed = await self.service.claim(self.worker_id, free, self.lease)
+                    for job in claimed:
+                        self._running[job["id"]] = asyncio.create_task(self._execute(job))
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        try:
+            await self._process(job)
+        except Exception as e:
+            # The outcome was not recorded; the job runs again once its lease expires
+            logger.error(f"Failed to record job outcome: {str(e)}", extra={"job_id": job_id})
+        finally:
+            del self._running[job_id]
+            self._wakeup.set()
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        work = asyncio.create_task(self._call(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, work))
+        try:
+            result = await work
+            await self.service.finish(job_id, self.worker_id, "succeeded", result=result)
+            logger.info("Job succeeded", extra={"job_id": job_id, "kind": job["kind"]})
+        except asyncio.CancelledError:
+            if heartbeat.done() and heartbeat.result() == "cancel":
+                await self.service.finish(job_id, self.worker_id, "cancelled")
+                logger.info("Job cancelled", extra={"job_id": job_id})
+            elif not heartbeat.done() or heartbeat.result() != "lost":
+                # Worker shutdown: give the job back for another worker
+                await self.service.release(job_id, self.worker_id)
+                raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            if job["attempts"] < job["max_attempts"]:
+                delay = self.retry_backoff * 2 ** (job["attempts"] - 1)
+                await self.service.retry(job_id, self.worker_id, error, delay)
+                logger.warning(
+                    f"Job attempt failed, retrying: {error}",
+                    extra={"job_id": job_id, "attempt": job["attempts"], "delay": delay},
+                )
+            else:
+                await self.service.finish(job_id, self.worker_id, "failed", error=error)
+                logger.error(f"Job failed: {error}", extra={"job_id": job_id})
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _call(self, job: Dict[str, Any]) -> Any:
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            raise ValueError(f"Unknown job kind {job['kind']!r}")
+        return await asyncio.wait_for(handler(job["payload"]), self.timeout)
+
+    async def _heartbeat(self, job_id: str, work: asyncio.Task) -> str:
+        """Renew the lease until the job ends; cancel it if asked to or if the lease is lost."""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                cancel_requested = await self.service.heartbeat(job_id, self.worker_id, self.lease)
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {str(e)}", extra={"job_id": job_id})
+                continue
+            if cancel_requested is None:
+                logger.warning("Job lease lost", extra={"job_id": job_id})
+                work.cancel()
+                return "lost"
+            if cancel_requested:
+                work.cancel()
+                return "cancel"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": len(self._running),
+        }
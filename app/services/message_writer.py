@@ -0,0 +1,237 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logger import logger
+from app.models.models import Message, Thread, User
+
+
+class MessageWriter:
+    """
+    Write-behind buffer for ``messages`` rows and thread summaries.
+
+    Chat turns enqueue rows and return immediately; a background task flushes
+    them as one multi-row INSERT when ``batch_size`` rows are waiting or every
+    ``flush_interval`` seconds. Thread summaries are written in the same
+    transaction, only the latest per thread. Readers call ``flush_thread`` before querying a
+    thread so they always see that thread's own writes.
+
+    A batch rejected by a constraint is retried row by row and the rows that
+    still fail are dropped and logged, so one bad row cannot block every
+    later flush. At most ``max_buffer`` rows are held; past that the oldest
+    are dropped. Callers check ``accepts`` before queueing rows for a thread
+    or user that may not exist.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = settings.MESSAGE_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.MESSAGE_FLUSH_INTERVAL,
+        max_buffer: int = settings.MESSAGE_BUFFER_MAX,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._summaries: Dict[int, Tuple[str, datetime]] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[int], None]] = []
+        # (thread_id, user_id) pairs known to exist
+        self._known = TTLCache(maxsize=10000, ttl=300)
+        # thread_id -> (summary,) last written or read; a 1-tuple so a
+        # thread without a summary is remembered too
+        self._stored = TTLCache(maxsize=10000, ttl=300)
+        self.dropped = 0
+        self.rejected = 0
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """Call ``callback(thread_id)`` whenever a thread gets new messages."""
+        self._listeners.append(callback)
+
+    async def accepts(self, thread_id: int, user_id: Optional[int] = None) -> bool:
+        """
+        Whether rows for ``thread_id`` and ``user_id`` can be inserted.
+
+        Existing pairs are remembered for a few minutes. When the database
+        cannot be asked the answer is yes; the flush copes with bad rows.
+        """
+        if self._known.get((thread_id, user_id)):
+            return True
+        try:
+            async with self.session_factory() as session:
+                found = await session.scalar(select(Thread.id).where(Thread.id == thread_id))
+                if found is not None and user_id is not None:
+                    found = await session.scalar(select(User.id).where(User.id == user_id))
+        except Exception as e:
+            logger.warning(f"Failed to check message owner: {str(e)}", extra={"thread_id": thread_id})
+            return True
+        if found is None:
+            return False
+        self._known.set((thread_id, user_id), True)
+        return True
+
+    async def enqueue(self, *rows: Dict[str, Any]) -> None:
+        """
+        Queue ``messages`` rows for insertion.
+
+        ``created_at`` is stamped now so ordering reflects when the message was
+        produced, not when it was flushed. Database errors never reach the
+        caller; if rows pile up past ``max_buffer`` (for example while the
+        database is unreachable) the oldest are dropped.
+        """
+        now = datetime.utcnow()
+        for row in rows:
+            self._buffer.append({"created_at": now, **row})
+        self._trim()
+        for thread_id in {row.get("thread_id") for row in rows}:
+            for callback in self._listeners:
+                callback(thread_id)
+
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim(self) -> None:
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow <= 0:
+            return
+        del self._buffer[:overflow]
+        self.dropped += overflow
+        logger.error(
+            f"Message buffer full, dropped {overflow} unflushed rows",
+            extra={"max_buffer": self.max_buffer, "dropped_total": self.dropped},
+        )
+
+    def set_summary(self, thread_id: int, summary: str) -> None:
+        """Queue ``summary`` as the thread's stored summary, replacing any queued one."""
+        self._summaries[thread_id] = (summary, datetime.utcnow())
+        self._stored.set(thread_id, (summary,))
+
+    async def summary(self, thread_id: int) -> Optional[str]:
+        """
+        Return the thread's latest summary, including one not flushed yet.
+
+        Summaries this writer set or read are remembered for a few minutes,
+        so only the first turn of a thread in this process queries the
+        database. Read errors are logged and reported as no summary, so a
+        turn never fails over its context.
+        """
+        if thread_id in self._summaries:
+            return self._summaries[thread_id][0]
+        stored = self._stored.get(thread_id)
+        if stored is not None:
+            return stored[0]
+        try:
+            async with self.session_factory() as session:
+                summary = await session.scalar(select(Thread.summary).where(Thread.id == thread_id))
+        except Exception as e:
+            logger.warning(f"Failed to read thread summary: {str(e)}", extra={"thread_id": thread_id})
+            return None
+        self._stored.set(thread_id, (summary,))
+        return summary
+
+    def pending(self, thread_id: int) -> List[Dict[str, Any]]:
+        """Return rows for ``thread_id`` that have not been flushed yet."""
+        return [row for row in self._buffer if row.get("thread_id") == thread_id]
+
+    async def flush_thread(self, thread_id: int) -> None:
+        """Make every write for ``thread_id`` visible to database readers."""
+        if self.pending(thread_id) or self._lock.locked():
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Insert all buffered rows in one batch and return how many were written."""
+        async with self._lock:
+            rows, self._buffer = self._buffer, []
+            summaries, self._summaries = self._summaries, {}
+            if not rows and not summaries:
+                return 0
+            try:
+                try:
+                    await self._write(rows, summaries)
+                    return len(rows)
+                except IntegrityError:
+                    # Some row breaks a constraint; find it without losing the rest
+                    await self._write([], summaries)
+                    summaries = {}
+                    written = 0
+                    while rows:
+                        written += await self._write_one(rows[0])
+                        rows = rows[1:]
+                    return written
+            except Exception:
+                # Keep the rows, ahead of anything queued meanwhile, for the next flush
+                self._buffer = rows + self._buffer
+                self._summaries = {**summaries, **self._summaries}
+                self._trim()
+                raise
+
+    async def _write(
+        self, rows: List[Dict[str, Any]], summaries: Dict[int, Tuple[str, datetime]]
+    ) -> None:
+        async with self.session_factory() as session:
+            if rows:
+                await session.execute(insert(Message), rows)
+            for thread_id, (summary, updated_at) in summaries.items():
+                await session.execute(
+                    update(Thread)
+                    .where(Thread.id == thread_id)
+                    .values(summary=summary, summary_updated_at=updated_at)
+                )
+            await session.commit()
+
+    async def _write_one(self, row: Dict[str, Any]) -> int:
+        """Insert one row on its own; drop and log it if a constraint rejects it."""
+        try:
+            await self._write([row], {})
+            return 1
+        except IntegrityError as e:
+            self.rejected += 1
+            logger.error(
+                f"Dropped a message row the database rejected: {str(e.orig)}",
+                extra={"thread_id": row.get("thread_id"), "user_id": row.get("user_id")},
+            )
+            return 0
+
+    def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and durably write everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(
+                f"Failed to flush {len(self._buffer)} messages on shutdown: {str(e)}",
+                exc_info=True,
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Message flush failed: {str(e)}", exc_info=True)
+
+
+message_writer = MessageWriter()
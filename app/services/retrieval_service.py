@@ -0,0 +1,159 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.vectorstore import collection_name, get_embeddings, get_qdrant_client
+
+_SUBQUERY_SPLIT = re.compile(r"[?;\n]+|\.\s+|\s+(?:and also|as well as)\s+", re.IGNORECASE)
+
+
+def split_queries(text: str, limit: int = settings.RETRIEVAL_MAX_SUBQUERIES) -> List[str]:
+    """
+    Break a message into the sub-queries it asks, at most ``limit``.
+
+    Splits on sentence and clause boundaries and drops fragments too short to
+    search for; a message with a single question is returned unchanged.
+    """
+    parts = [part.strip() for part in _SUBQUERY_SPLIT.split(text)]
+    queries = [part for part in parts if len(part.split()) >= 3]
+    return queries[:limit] or [text.strip()]
+
+
+class RetrievalService:
+    """
+    Top-k vector search over a user's ingested documents.
+
+    All sub-queries of a message are embedded in one request and searched in
+    one ``query_batch_points`` call, restricted to the user's ``user_id``.
+    Searches run on the quantized vectors and rescore the best
+    ``top_k * RETRIEVAL_OVERSAMPLING`` candidates against the originals.
+    Hits are cached per query embedding for ``RETRIEVAL_CACHE_TTL`` seconds,
+    so repeated questions skip Qdrant; newly ingested documents show up once
+    the entry expires. Whether a user's collection exists is cached for as
+    long; ingestion calls ``collection_created`` so a new collection is
+    searched at once in the same process.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        embeddings=None,
+        top_k: int = settings.RETRIEVAL_TOP_K,
+        cache_maxsize: int = settings.RETRIEVAL_CACHE_MAXSIZE,
+        cache_ttl: float = settings.RETRIEVAL_CACHE_TTL,
+    ):
+        self._client = client
+        self._embeddings = embeddings
+        self.top_k = top_k
+        self.cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+        self._collections = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl)
+
+    @property
+    def client(self):
+        return self._client or get_qdrant_client()
+
+    @property
+    def embeddings(self):
+        return self._embeddings or get_embeddings()
+
+    def collection_created(self, collection: str) -> None:
+        """Forget a cached "collection missing" answer for ``collection``."""
+        self._collections.delete(collection)
+
+    async def _collection_exists(self, client, collection: str) -> bool:
+        exists = self._collections.get(collection)
+        if exists is None:
+            exists = await client.collection_exists(collection)
+            self._collections.set(collection, exists)
+        return exists
+
+    @staticmethod
+    def _cache_key(collection: str, user_id: int, vector, top_k: int) -> str:
+        digest = hashlib.sha256(np.asarray(vector, dtype=np.float32).tobytes()).hexdigest()
+        return f"{collection}:{user_id}:{top_k}:{digest}"
+
+    async def search(
+        self, queries: List[str], user_id: int, top_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the user's documents for every query and merge the hits.
+
+        Args:
+            queries: Sub-queries to search for
+            user_id: Owner of the documents; only their points are searched
+            top_k: Hits to return; defaults to ``RETRIEVAL_TOP_K``
+
+        Returns:
+            Up to ``top_k`` hits, best first, each with id, score, text,
+            source, page and the sub-query that matched
+        """
+        from qdrant_client import models
+
+        top_k = top_k or self.top_k
+        collection = collection_name(user_id)
+        client = self.client
+        if not await self._collection_exists(client, collection):
+            return []
+
+        vectors = await self.embeddings.aembed_documents(queries)
+        keys = [self._cache_key(collection, user_id, vector, top_k) for vector in vectors]
+        results: List[Optional[List[Dict[str, Any]]]] = [self.cache.get(key) for key in keys]
+
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending:
+            user_filter = models.Filter(
+                must=[
+                    models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))
+                ]
+            )
+            params = models.SearchParams(
+                quantization=models.QuantizationSearchParams(
+                    rescore=True, oversampling=settings.RETRIEVAL_OVERSAMPLING
+                )
+            )
+            try:
+                responses = await client.query_batch_points(
+                    collection,
+                    requests=[
+                        models.QueryRequest(
+                            query=vectors[index],
+                            filter=user_filter,
+                            params=params,
+                            limit=top_k,
+                            with_payload=True,
+                        )
+                        for index in pending
+                    ],
+                )
+            except Exception:
+                # The collection may have been dropped; ask again next time
+                self._collections.delete(collection)
+                raise
+            for index, response in zip(pending, responses):
+                hits = [
+                    {
+                        "id": str(point.id),
+                        "score": point.score,
+                        "text": point.payload.get("text"),
+                        "source": point.payload.get("source"),
+                        "page": point.payload.get("page"),
+                    }
+                    for point in response.points
+                ]
+                self.cache.set(keys[index], hits)
+                results[index] = hits
+
+        # A passage matching several sub-queries is kept once, with its best score
+        best: Dict[str, Dict[str, Any]] = {}
+        for query, hits in zip(queries, results):
+            for hit in hits:
+                if hit["id"] not in best or hit["score"] > best[hit["id"]]["score"]:
+                    best[hit["id"]] = {**hit, "query": query}
+        return sorted(best.values(), key=lambda hit: hit["score"], reverse=True)[:top_k]
+
+
+retrieval_service = RetrievalService()
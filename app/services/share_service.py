@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.cache import SQLiteCache, TieredCache, TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import Message, Share, Thread
+from app.services.message_writer import message_writer
+
+# (serialized snapshot, ETag)
+Snapshot = Tuple[bytes, str]
+
+
+class ShareService:
+    """
+    Serves shared threads from pre-rendered JSON snapshots.
+
+    Snapshots are cached per thread in memory, optionally backed by a SQLite
+    file shared by the workers on a host. The worker that writes a thread's
+    new message drops its snapshot at once; other workers only see that
+    through the SQLite tier once their memory copy expires, after
+    ``SHARE_CACHE_MEMORY_TTL`` seconds. Workers without a shared tier, or on
+    other hosts, may serve a snapshot up to ``SHARE_CACHE_TTL`` seconds old.
+    Concurrent misses for the same thread share a single rebuild, so a viral
+    link costs one database read per change.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, writer=None):
+        self.session_factory = session_factory
+        self.writer = writer or message_writer
+        disk = (
+            SQLiteCache(
+                settings.SHARE_CACHE_PATH, table="share_snapshots", ttl=settings.SHARE_CACHE_TTL
+            )
+            if settings.SHARE_CACHE_PATH
+            else None
+        )
+        self.snapshots = TieredCache(
+            TTLCache(
+                maxsize=settings.SHARE_CACHE_MAXSIZE,
+                ttl=min(settings.SHARE_CACHE_MEMORY_TTL, settings.SHARE_CACHE_TTL),
+            ),
+            disk,
+        )
+        # Shares never move to another thread, so uid lookups can live longer
+        self.share_threads = TTLCache(maxsize=settings.SHARE_CACHE_MAXSIZE * 4)
+        self._building: Dict[int, asyncio.Future] = {}
+        self._stale: Set[int] = set()
+        self._evictions: Set[asyncio.Task] = set()
+        self.writer.add_listener(self.invalidate_thread)
+
+    def invalidate_thread(self, thread_id: int) -> None:
+        """
+        Drop the cached snapshot of ``thread_id``.
+
+        Runs on the event loop for every queued message, so only the memory
+        tier is cleared here; the SQLite delete runs in a worker thread.
+        """
+        if thread_id in self._building:
+            self._stale.add(thread_id)
+        key = f"thread:{thread_id}"
+        self.snapshots.memory.delete(key)
+        if self.snapshots.disk is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._evict(key)
+            return
+        task = loop.create_task(asyncio.to_thread(self._evict, key))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    def _evict(self, key: str) -> None:
+        self.snapshots.disk.delete(key)
+        # A read may have promoted the old disk copy in the meantime
+        self.snapshots.memory.delete(key)
+
+    async def get_snapshot(self, uid: str) -> Optional[Snapshot]:
+        """Return the snapshot of the thread shared as ``uid``, or ``None``."""
+        thread_id = self.share_threads.get(uid)
+        if thread_id is None:
+            thread_id = await self._resolve_share(uid)
+            if thread_id is None:
+                return None
+            self.share_threads.set(uid, thread_id)
+
+        key = f"thread:{thread_id}"
+        snapshot = await asyncio.to_thread(self.snapshots.get, key)
+        if snapshot is not None:
+            return snapshot
+
+        pending = self._building.get(thread_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[thread_id] = future
+        try:
+            snapshot = await self._render(thread_id)
+            if snapshot is None:
+                # The thread was deleted after it was shared
+                self.share_threads.delete(uid)
+            elif thread_id not in self._stale:
+                # Skip caching if the thread changed while it was being rendered
+                await asyncio.to_thread(self.snapshots.set, key, snapshot)
+            future.set_result(snapshot)
+            return snapshot
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._building[thread_id]
+            self._stale.discard(thread_id)
+
+    async def _resolve_share(self, uid: str) -> Optional[int]:
+        async with self.session_factory() as session:
+            return (
+                await session.execute(select(Share.thread_id).where(Share.uid == uid))
+            ).scalar_one_or_none()
+
+    async def _render(self, thread_id: int) -> Optional[Snapshot]:
+        await self.writer.flush_thread(thread_id)
+        async with self.session_factory() as session:
+            thread = (
+                await session.execute(
+                    select(Thread.id, Thread.title, Thread.created_at).where(
+                        Thread.id == thread_id
+                    )
+                )
+            ).mappings().one_or_none()
+            if thread is None:
+                return None
+            messages = (
+                await session.execute(
+                    select(
+                        Message.id,
+                        Message.content,
+                        Message.is_bot,
+                        Message.created_at,
+                        Message.suggested_questions,
+                    )
+                    .where(Message.thread_id == thread_id)
+                    .order_by(Message.created_at, Message.id)
+                )
+            ).mappings().all()
+
+        body = json.dumps(
+            {
+                "thread": dict(thread),
+                "messages": [dict(message) for message in messages],
+            },
+            default=str,
+        ).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        return body, etag
+
+
+share_service = ShareService()
@@ -0,0 +1,222 @@
+import asyncio
+import base64
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.s3_bucket import S3_BUCKET, get_s3_client
+
+# boto3 calls block, so they run here instead of on the event loop
+_executor = ThreadPoolExecutor(
+    max_workers=settings.S3_UPLOAD_CONCURRENCY, thread_name_prefix="s3-upload"
+)
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+def _b64_sha256(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def _upload_part(s3_client, bucket: str, key: str, upload_id: str, part_number: int, body: bytes):
+    checksum = _b64_sha256(body)
+    response = s3_client.upload_part(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body,
+        ChecksumAlgorithm="SHA256",
+        ChecksumSHA256=checksum,
+    )
+    return {
+        "PartNumber": part_number,
+        "ETag": response["ETag"],
+        "ChecksumSHA256": checksum,
+    }
+
+
+async def stream_upload(
+    file: UploadFile,
+    key: str,
+    content_type: Optional[str] = None,
+    metadata: Optional[Dict[str, str]] = None,
+    s3_client=None,
+    bucket: Optional[str] = None,
+    part_size: int = settings.S3_UPLOAD_PART_SIZE,
+    max_size: int = settings.S3_UPLOAD_MAX_SIZE,
+    concurrency: int = settings.S3_UPLOAD_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Stream an uploaded file to S3 without blocking the event loop.
+
+    The body is read ``part_size`` bytes at a time. Files that fit in one part
+    are sent with a single PUT; larger ones use a multipart upload with up to
+    ``concurrency`` parts in flight on the upload executor, so at most
+    ``concurrency`` parts are held in memory. A SHA-256 of the whole object is
+    computed while streaming and every part is sent with its own checksum for
+    S3 to verify. If anything fails, or the body grows past ``max_size``, the
+    multipart upload is aborted.
+
+    Args:
+        file: The incoming upload
+        key: Object key to write
+        content_type: Content type stored on the object
+        metadata: User metadata stored on the object
+        s3_client: Client to use, defaults to the shared client
+        bucket: Bucket to write to, defaults to ``S3_BUCKET``
+        part_size: Bytes per part, at least 5 MiB for S3 multipart uploads
+        max_size: Largest accepted object in bytes
+        concurrency: Maximum number of parts uploading at once
+
+    Returns:
+        Dictionary with the size, SHA-256, part count, duration and throughput
+
+    Raises:
+        UploadTooLarge: The body exceeds ``max_size``
+    """
+    s3_client = s3_client or get_s3_client()
+    bucket = bucket or S3_BUCKET
+    loop = asyncio.get_running_loop()
+    extra = {"ContentType": content_type or "application/octet-stream", "Metadata": metadata or {}}
+
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(f"File exceeds the limit of {max_size} bytes")
+
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    chunk = await file.read(part_size)
+    total = len(chunk)
+    if total > max_size:
+        raise UploadTooLarge(f"File exceeds the limit of {max_size} bytes")
+
+    if total < part_size:
+        # Hashing megabytes would stall the loop; hashlib releases the GIL
+        await asyncio.to_thread(digest.update, chunk)
+        await loop.run_in_executor(
+            _executor,
+            partial(
+                s3_client.put_object,
+                Bucket=bucket,
+                Key=key,
+                Body=chunk,
+                # The whole object is this one chunk, so its digest is the part's
+                ChecksumSHA256=base64.b64encode(digest.digest()).decode(),
+                **extra,
+            ),
+        )
+        parts = 1
+    else:
+        total, parts = await _multipart_upload(
+            s3_client, bucket, key, extra, file, chunk, digest, part_size, max_size, concurrency
+        )
+
+    seconds = time.perf_counter() - start
+    return {
+        "size": total,
+        "sha256": digest.hexdigest(),
+        "parts": parts,
+        "seconds": round(seconds, 3),
+        "throughput_mbps": round(total / seconds / 1_000_000, 3) if seconds else None,
+    }
+
+
+async def _multipart_upload(
+    s3_client,
+    bucket: str,
+    key: str,
+    extra: Dict[str, Any],
+    file: UploadFile,
+    chunk: bytes,
+    digest,
+    part_size: int,
+    max_size: int,
+    concurrency: int,
+) -> Tuple[int, int]:
+    """Upload ``file`` as a multipart upload, starting with ``chunk``.
+
+    Returns the total size and the number of parts.
+    """
+    loop = asyncio.get_running_loop()
+    upload_id = (
+        await loop.run_in_executor(
+            _executor,
+            partial(
+                s3_client.create_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                ChecksumAlgorithm="SHA256",
+                **extra,
+            ),
+        )
+    )["UploadId"]
+
+    slots = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def send(part_number: int, body: bytes) -> Dict[str, Any]:
+        try:
+            return await loop.run_in_executor(
+                _executor,
+                partial(_upload_part, s3_client, bucket, key, upload_id, part_number, body),
+            )
+        finally:
+            slots.release()
+
+    total = 0
+    try:
+        part_number = 1
+        while chunk:
+            total += len(chunk)
+            if total > max_size:
+                raise UploadTooLarge(f"File exceeds the limit of {max_size} bytes")
+            await asyncio.to_thread(digest.update, chunk)
+
+            await slots.acquire()
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    slots.release()
+                    raise task.exception()
+            tasks.append(asyncio.create_task(send(part_number, chunk)))
+
+            part_number += 1
+            chunk = await file.read(part_size)
+
+        uploaded = await asyncio.gather(*tasks)
+        await loop.run_in_executor(
+            _executor,
+            partial(
+                s3_client.complete_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": uploaded},
+            ),
+        )
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await loop.run_in_executor(
+                _executor,
+                partial(
+                    s3_client.abort_multipart_upload,
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                ),
+            )
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {upload_id}: {str(e)}")
+        raise
+
+    return total, len(tasks)
@@ -0,0 +1,26 @@
+"""Inert settings so benchmarks can import the app without a ``.env`` file."""
+
+import os
+
+DEFAULTS = {
+    "PROJECT_NAME": "agentic-ai-bench",
+    "VERSION": "0.0.0",
+    "API_V1_STR": "/api/v1",
+    "QDRANT_API_KEY": "bench",
+    "QDRANT_URL": "http://localhost:6333",
+    "OPENAI_API_KEY": "sk-bench",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "bench",
+    "POSTGRES_PASSWORD": "bench",
+    "POSTGRES_DB": "bench",
+    "SECRET_KEY": "bench",
+    "CHECKPOINTER_ENABLED": "false",
+    # Backpressure would turn load tests into 429s and 503s; only the
+    # admission benchmark turns it on
+    "RATE_LIMIT_ENABLED": "false",
+    "ADMISSION_ENABLED": "false",
+}
+
+for _key, _value in DEFAULTS.items():
+    os.environ.setdefault(_key, _value)
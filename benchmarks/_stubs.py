@@ -0,0 +1,64 @@
+"""Stand-ins for external services so benchmarks run offline and repeatably."""
+
+import asyncio
+import time
+import warnings
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.core.registry import registry
+
+
+class StubChatModel(BaseChatModel):
+    """Deterministic chat model that echoes the prompt after a fixed delay."""
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages) -> ChatResult:
+        content = f"stub reply to: {messages[-1].content[:80]}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+class StubEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic embeddings with a fixed delay per batch request."""
+
+    latency: float = 0.0
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(self.latency)
+        # Plain floats, as a real embeddings client returns
+        return [[float(x) for x in vector] for vector in self.embed_documents(texts)]
+
+
+def install_stubs(llm_latency: float = 0.0, embed_latency: float = 0.0, vector_size: int = 256):
+    """Register the stub LLMs, stub embedder and an in-memory Qdrant."""
+    from qdrant_client import AsyncQdrantClient
+
+    from app.core.embedding_cache import CachedEmbeddings
+
+    registry.set("workflow_llm", StubChatModel(latency=llm_latency))
+    registry.set("router_llm", StubChatModel(latency=llm_latency))
+    registry.set("summary_llm", StubChatModel(latency=llm_latency))
+    registry.set(
+        "embeddings",
+        CachedEmbeddings(StubEmbeddings(size=vector_size, latency=embed_latency), model="stub"),
+    )
+    registry.set("qdrant_client", AsyncQdrantClient(":memory:"))
+    # Local mode ignores payload indexes and search params; that is expected here
+    warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+    warnings.filterwarnings("ignore", message="Local mode performs exact")
@@ -0,0 +1,115 @@
+"""Benchmark: latency of admitted requests under a burst, with and without backpressure.
+
+Fires ``--burst`` concurrent ``POST /chat`` requests at the in-process app,
+first with admission control off (every request is accepted and they all
+compete for the event loop) and then with a cap on in-flight executions and
+a bounded wait queue (excess requests get a 503 at once). Reports the
+latency percentiles of the requests that were served and how many were
+shed. A last run sends the burst from a single user to show the token
+bucket answering 429.
+
+Usage:
+    python -m benchmarks.admission --burst 400 --llm-latency 0.05 \\
+        --max-in-flight 16 --max-queue 16
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+import httpx  # noqa: E402
+
+from app.api import chat  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.ratelimit import AdmissionController, RateLimiter  # noqa: E402
+from app.services.message_writer import message_writer  # noqa: E402
+from benchmarks.chat_pipeline import MESSAGES, setup_environment, summarize  # noqa: E402
+
+
+async def burst(client: httpx.AsyncClient, size: int, same_user: bool) -> Dict[str, Any]:
+    url = f"{settings.API_V1_STR}/chat/chat"
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def one(i: int) -> None:
+        start = time.perf_counter()
+        response = await client.post(
+            url,
+            json={
+                # Unique text so the LLM cache cannot absorb the burst
+                "message": f"{MESSAGES[i % len(MESSAGES)]} (request {i})",
+                "thread_id": str(i),
+                "user_id": 1 if same_user else 1000 + i,
+            },
+        )
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(size)))
+    result = summarize(
+        {"latencies": latencies, "errors": 0, "wall": time.perf_counter() - start}, size
+    )
+    result["statuses"] = dict(sorted(statuses.items()))
+    return result
+
+
+def report(label: str, result: Dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"{label:<12} served={result['statuses'].get(200, 0):<5} "
+        f"p50={latency['p50']:>9.1f} p95={latency['p95']:>9.1f} p99={latency['p99']:>9.1f} ms "
+        f"statuses={result['statuses']}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    from main import app
+
+    engine = await setup_environment(args.llm_latency)
+    settings.RATE_LIMIT_ENABLED = False
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            await burst(client, 20, same_user=False)
+
+            settings.ADMISSION_ENABLED = False
+            report("unlimited", await burst(client, args.burst, same_user=False))
+
+            settings.ADMISSION_ENABLED = True
+            chat.admission = AdmissionController(
+                max_in_flight=args.max_in_flight,
+                max_queue=args.max_queue,
+                queue_timeout=args.queue_timeout,
+            )
+            report("admission", await burst(client, args.burst, same_user=False))
+
+            settings.RATE_LIMIT_ENABLED = True
+            chat.rate_limiter = RateLimiter(rate=args.rate, burst=args.rate_burst)
+            report("one user", await burst(client, args.burst, same_user=True))
+    finally:
+        await message_writer.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=400)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--rate-burst", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Load test and regression benchmark for the chat pipeline.
+
+Drives three entry points with the same message mix under bounded
+concurrency:
+
+* ``graph``   -- the compiled ``chat_graph`` component via ``ainvoke``
+* ``service`` -- ``AgentService.process_message`` (graph + write-behind)
+* ``http``    -- ``POST /chat`` on the FastAPI app through an in-process
+  ASGI client, so routing, validation and middleware are included
+
+LLM-backed components and the embedder are replaced with deterministic stubs,
+``data_agent`` searches an in-memory Qdrant seeded with one document for
+``USER_ID``, and the message writer flushes into an in-memory SQLite
+database with foreign keys enforced and ``SEED_THREADS`` threads, so runs
+are reproducible and need no network. Each target is run twice: once for
+latency/throughput and once under ``tracemalloc`` for peak memory, so
+tracing does not skew the timings.
+
+Results are written as JSON. Pass ``--baseline`` with an earlier result file
+to exit non-zero when p95 latency, throughput or peak memory regress by more
+than ``--tolerance``.
+
+Usage:
+    python -m benchmarks.chat_pipeline --requests 500 --concurrency 32 \\
+        --output bench.json --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+import httpx  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.registry import registry  # noqa: E402
+from app.models.models import Base, Thread, User  # noqa: E402
+from app.services.agent_service import AgentService  # noqa: E402
+from app.services.ingestion_service import ingest_document  # noqa: E402
+from app.services.message_writer import message_writer  # noqa: E402
+from benchmarks._stubs import install_stubs  # noqa: E402
+
+MESSAGES = [
+    "Please fetch the latest sales data",
+    "Can you analyze last quarter and give me a summary?",
+    "Hello there!",
+]
+
+TARGETS = ("graph", "service", "http")
+
+USER_ID = 1
+
+# Threads 0..SEED_THREADS-1 exist, so turns on them are persisted
+SEED_THREADS = 5000
+
+SEED_DOCUMENT = "\n".join(
+    f"Sales for region {region} grew {region * 3} percent in quarter {quarter}."
+    for region in range(1, 40)
+    for quarter in range(1, 5)
+)
+
+
+async def setup_environment(llm_latency: float):
+    """Install the stubs and point the message writer at in-memory SQLite."""
+    install_stubs(llm_latency=llm_latency)
+    await ingest_document(
+        io.BytesIO(SEED_DOCUMENT.encode()),
+        source="bench.txt",
+        kind="text",
+        metadata={"user_id": USER_ID},
+    )
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    # Enforce foreign keys like Postgres, so rows for unknown threads fail
+    @event.listens_for(engine.sync_engine, "connect")
+    def _foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"id": USER_ID, "email": "bench@example.com"}])
+        await conn.execute(
+            insert(Thread), [{"id": i, "user_id": USER_ID} for i in range(SEED_THREADS)]
+        )
+    message_writer.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    message_writer.start()
+    return engine
+
+
+def build_targets(client: httpx.AsyncClient) -> Dict[str, Callable[[int], Awaitable[None]]]:
+    """Return one coroutine function per target taking the request index."""
+    graph = registry.get("chat_graph")
+    service = AgentService(graph=graph)
+    chat_url = f"{settings.API_V1_STR}/chat/chat"
+
+    async def run_graph(i: int) -> None:
+        await graph.ainvoke(
+            {
+                "messages": [{"role": "user", "content": MESSAGES[i % len(MESSAGES)]}],
+                "user_id": USER_ID,
+            },
+            config={"configurable": {"thread_id": str(i)}},
+        )
+
+    async def run_service(i: int) -> None:
+        await service.process_message(
+            user_message=MESSAGES[i % len(MESSAGES)], thread_id=str(i), user_id=USER_ID
+        )
+
+    async def run_http(i: int) -> None:
+        response = await client.post(
+            chat_url,
+            json={
+                "message": MESSAGES[i % len(MESSAGES)],
+                "thread_id": str(i),
+                "user_id": USER_ID,
+            },
+        )
+        response.raise_for_status()
+
+    return {"graph": run_graph, "service": run_service, "http": run_http}
+
+
+async def drive(
+    call: Callable[[int], Awaitable[None]], requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Issue ``requests`` calls with at most ``concurrency`` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {"latencies": latencies, "errors": errors, "wall": time.perf_counter() - start}
+
+
+def summarize(run: Dict[str, Any], requests: int) -> Dict[str, Any]:
+    latencies = run["latencies"]
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": requests,
+        "errors": run["errors"],
+        "throughput_rps": round(len(latencies) / run["wall"], 2) if run["wall"] else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "p50": round(p50, 3),
+            "p95": round(p95, 3),
+            "p99": round(p99, 3),
+            "max": round(max(latencies), 3) if latencies else 0.0,
+        },
+    }
+
+
+async def measure_memory(
+    call: Callable[[int], Awaitable[None]], requests: int, concurrency: int
+) -> float:
+    """Peak traced memory (KiB) allocated while serving ``requests`` calls."""
+    tracemalloc.start()
+    try:
+        await drive(call, requests, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import app
+
+    engine = await setup_environment(args.llm_latency)
+    results: Dict[str, Any] = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            targets = build_targets(client)
+            for name in args.targets:
+                call = targets[name]
+                await drive(call, args.warmup, args.concurrency)
+                summary = summarize(
+                    await drive(call, args.requests, args.concurrency), args.requests
+                )
+                summary["peak_memory_kib"] = await measure_memory(
+                    call, args.requests, args.concurrency
+                )
+                results[name] = summary
+    finally:
+        await message_writer.close()
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency": args.llm_latency,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Return one message per metric that regressed beyond ``tolerance``."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        checks = [
+            ("p95 latency", result["latency_ms"]["p95"], base["latency_ms"]["p95"], True),
+            ("throughput", result["throughput_rps"], base["throughput_rps"], False),
+            ("peak memory", result["peak_memory_kib"], base["peak_memory_kib"], True),
+        ]
+        for label, value, reference, higher_is_worse in checks:
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            if (change if higher_is_worse else -change) > tolerance:
+                regressions.append(
+                    f"{name}: {label} {reference:g} -> {value:g} ({change:+.1%})"
+                )
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+def report(results: Dict[str, Any]) -> None:
+    print(
+        f"{'target':<8} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} "
+        f"{'peak KiB':>10} {'errors':>6}"
+    )
+    for name, result in results["results"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<8} {result['throughput_rps']:>9.1f} {latency['p50']:>9.3f} "
+            f"{latency['p95']:>9.3f} {latency['p99']:>9.3f} "
+            f"{result['peak_memory_kib']:>10.1f} {result['errors']:>6}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.0,
+        help="seconds the stub LLM sleeps per call",
+    )
+    parser.add_argument(
+        "--targets", nargs="+", choices=TARGETS, default=list(TARGETS)
+    )
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="allowed relative regression before failing (default 0.2 = 20%%)",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(results)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline: Optional[Dict[str, Any]] = json.load(fh)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
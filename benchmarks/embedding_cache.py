@@ -0,0 +1,99 @@
+"""Benchmark: embedding cache hit rate on re-uploaded and edited documents.
+
+Ingests a generated text document, then the same document again, then a
+version with reflowed whitespace and a few edited lines, through
+``CachedEmbeddings`` in front of a stub embedder that counts every text it
+is asked to embed. A final pass uses a fresh cache on the same SQLite file
+to show hits surviving a restart.
+
+Usage:
+    python -m benchmarks.embedding_cache --pages 100 --embed-latency 0.02
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import tempfile
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+
+from app.core.embedding_cache import CachedEmbeddings  # noqa: E402
+from app.services.ingestion_service import ingest_document  # noqa: E402
+from benchmarks._stubs import StubEmbeddings  # noqa: E402
+from benchmarks.ingestion import LINES_PER_PAGE, random_line  # noqa: E402
+
+
+class CountingEmbeddings(StubEmbeddings):
+    """Stub embedder that counts the texts it embeds."""
+
+    embedded: int = 0
+
+    async def aembed_documents(self, texts):
+        self.embedded += len(texts)
+        return await super().aembed_documents(texts)
+
+
+def variants(pages: int, edits: int, rng: random.Random):
+    lines = [random_line(rng) for _ in range(pages * LINES_PER_PAGE)]
+    original = "\n".join(lines)
+    edited = list(lines)
+    for index in rng.sample(range(len(edited)), edits):
+        edited[index] = random_line(rng)
+    # Same words, different whitespace, plus a few changed lines
+    reflowed = "\n".join(line.replace(" ", "  ") for line in edited)
+    return [("original", original), ("re-upload", original), ("edited", reflowed)]
+
+
+async def ingest(text: str, embeddings, client) -> dict:
+    return await ingest_document(
+        io.BytesIO(text.encode()), source="doc.txt", kind="text",
+        client=client, embeddings=embeddings, collection="bench",
+    )
+
+
+async def run(args: argparse.Namespace, path: str) -> None:
+    rng = random.Random(args.seed)
+    stub = CountingEmbeddings(size=args.vector_size, latency=args.embed_latency)
+    client = AsyncQdrantClient(":memory:")
+
+    cache = CachedEmbeddings(stub, model="stub", path=path)
+    for label, text in variants(args.pages, args.edits, rng):
+        before, hits, misses = stub.embedded, cache.hits, cache.misses
+        stats = await ingest(text, cache, client)
+        lookups = cache.hits - hits + cache.misses - misses
+        print(
+            f"{label:<10} chunks={stats['chunks']:<6} embedded={stub.embedded - before:<6} "
+            f"hit_rate={(cache.hits - hits) / lookups:>6.1%} "
+            f"{stats['chunks_per_sec']:>9.1f} chunks/s"
+        )
+
+    restarted = CachedEmbeddings(stub, model="stub", path=path)
+    before = stub.embedded
+    stats = await ingest(variants(args.pages, args.edits, random.Random(args.seed))[0][1], restarted, client)
+    print(
+        f"{'restart':<10} chunks={stats['chunks']:<6} embedded={stub.embedded - before:<6} "
+        f"hit_rate={restarted.stats()['hit_rate']:>6.1%} {stats['chunks_per_sec']:>9.1f} chunks/s"
+    )
+    print(f"overall hit rate (first cache): {cache.stats()['hit_rate']:.1%}")
+    await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--edits", type=int, default=20, help="lines changed in the edited version")
+    parser.add_argument("--vector-size", type=int, default=256)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args, os.path.join(tmp, "embeddings.sqlite")))
+
+
+if __name__ == "__main__":
+    main()
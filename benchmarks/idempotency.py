@@ -0,0 +1,128 @@
+"""Benchmark: graph executions saved by single-flight and idempotency keys.
+
+Simulates mobile clients that give up on ``POST /chat`` after
+``--client-timeout`` seconds and retry the same turn, up to ``--retries``
+times. The chat graph's agents are stubs, so each execution is slowed by
+``--turn-latency`` seconds to stand in for model time. The same traffic is
+sent three times:
+
+* ``baseline``  -- every request runs the graph, as before coalescing
+* ``no keys``   -- retries arriving while the turn runs share it
+* ``with keys`` -- one ``Idempotency-Key`` per turn, so late retries get
+  the stored response too
+
+Usage:
+    python -m benchmarks.idempotency --turns 200 --turn-latency 0.5 \\
+        --client-timeout 0.3 --retries 2
+"""
+
+import argparse
+import asyncio
+import uuid
+from typing import Any, Dict
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+import httpx  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.agent_service import AgentService  # noqa: E402
+from app.services.idempotency_service import IdempotencyService  # noqa: E402
+from app.services.message_writer import message_writer  # noqa: E402
+from benchmarks.chat_pipeline import MESSAGES, setup_environment  # noqa: E402
+
+executions = 0
+original_run = IdempotencyService.run
+
+
+def slow_down(latency: float) -> None:
+    """Count graph executions and make each take at least ``latency`` seconds."""
+    original = AgentService.process_message
+
+    async def process_message(self, *args, **kwargs):
+        global executions
+        executions += 1
+        await asyncio.sleep(latency)
+        return await original(self, *args, **kwargs)
+
+    AgentService.process_message = process_message
+
+
+async def run_directly(self, key, request_hash, call, store=True, admit=None):
+    """``IdempotencyService.run`` without coalescing, for the baseline."""
+    if admit is not None:
+        await admit()
+    return await call(), False
+
+
+async def traffic(
+    client: httpx.AsyncClient, args: argparse.Namespace, with_keys: bool, run: str
+) -> Dict[str, Any]:
+    url = f"{settings.API_V1_STR}/chat/chat"
+    completed = 0
+
+    async def turn(i: int) -> None:
+        nonlocal completed
+        body = {
+            "message": f"{MESSAGES[i % len(MESSAGES)]} (turn {i})",
+            "thread_id": f"{run}-{i}",
+            "user_id": 1000 + i,
+        }
+        headers = {"Idempotency-Key": str(uuid.uuid4())} if with_keys else {}
+        for attempt in range(args.retries + 1):
+            timeout = None if attempt == args.retries else args.client_timeout
+            try:
+                response = await asyncio.wait_for(
+                    client.post(url, json=body, headers=headers), timeout
+                )
+            except asyncio.TimeoutError:
+                continue
+            if response.status_code == 200:
+                completed += 1
+            return
+
+    await asyncio.gather(*(turn(i) for i in range(args.turns)))
+    return {"completed": completed}
+
+
+async def run(args: argparse.Namespace) -> None:
+    from main import app
+
+    engine = await setup_environment(0.0)
+    settings.RATE_LIMIT_ENABLED = False
+    settings.ADMISSION_ENABLED = False
+    slow_down(args.turn_latency)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            runs = (
+                ("baseline", False, run_directly),
+                ("no keys", False, original_run),
+                ("with keys", True, original_run),
+            )
+            for label, with_keys, service_run in runs:
+                IdempotencyService.run = service_run
+                before = executions
+                result = await traffic(client, args, with_keys, label.replace(" ", "-"))
+                # Let executions abandoned by timed-out clients finish
+                await asyncio.sleep(args.turn_latency * 2)
+                print(
+                    f"{label:<10} turns={args.turns} completed={result['completed']:<5} "
+                    f"executions={executions - before}"
+                )
+    finally:
+        await message_writer.close()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--turn-latency", type=float, default=0.5)
+    parser.add_argument("--client-timeout", type=float, default=0.3)
+    parser.add_argument("--retries", type=int, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
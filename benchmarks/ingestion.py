@@ -0,0 +1,119 @@
+"""Benchmark: streaming document ingestion into Qdrant.
+
+Generates a text file and a PDF of ``--pages`` pages, ingests each into an
+in-memory Qdrant with a deterministic stub embedder (optionally sleeping per
+request to mimic a remote embedding API) and reports pages/sec, chunks/sec
+and peak traced memory (from a second, traced run so tracing does not skew
+the rates). Run with two page counts to check that pipeline
+memory does not grow with the document: ``transient`` excludes what Qdrant's
+in-memory storage retains.
+
+Usage:
+    python -m benchmarks.ingestion --pages 200 --embed-latency 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import string
+import tempfile
+import tracemalloc
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from pypdf import PdfWriter  # noqa: E402
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject  # noqa: E402
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+
+from app.services.ingestion_service import ingest_document  # noqa: E402
+from benchmarks._stubs import StubEmbeddings  # noqa: E402
+
+LINES_PER_PAGE = 50
+
+
+def random_line(rng: random.Random) -> str:
+    words = (
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+        for _ in range(12)
+    )
+    return " ".join(words)
+
+
+def write_text(path: str, pages: int, rng: random.Random) -> None:
+    with open(path, "w") as fh:
+        for _ in range(pages * LINES_PER_PAGE):
+            fh.write(random_line(rng) + "\n")
+
+
+def write_pdf(path: str, pages: int, rng: random.Random) -> None:
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for _ in range(pages):
+        page = writer.add_blank_page(612, 792)
+        lines = " ".join(f"({random_line(rng)}) '" for _ in range(LINES_PER_PAGE))
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 9 Tf 11 TL 40 760 Td {lines} ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+    with open(path, "wb") as fh:
+        writer.write(fh)
+
+
+async def ingest(path: str, kind: str, args: argparse.Namespace, trace: bool = False):
+    """Ingest ``path``; with ``trace``, also return (peak, transient) bytes."""
+    client = AsyncQdrantClient(":memory:")
+    embeddings = StubEmbeddings(size=args.vector_size, latency=args.embed_latency)
+    if trace:
+        tracemalloc.start()
+    try:
+        with open(path, "rb") as fh:
+            stats = await ingest_document(
+                fh, source=os.path.basename(path), kind=kind,
+                client=client, embeddings=embeddings, collection="bench",
+            )
+        # Measured before closing the client, so stored points count as retained
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        if trace:
+            tracemalloc.stop()
+        await client.close()
+    return stats, peak, peak - retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--vector-size", type=int, default=256)
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            for kind, writer in (("text", write_text), ("pdf", write_pdf)):
+                path = os.path.join(tmp, f"doc-{pages}.{'pdf' if kind == 'pdf' else 'txt'}")
+                writer(path, pages, rng)
+                stats, _, _ = asyncio.run(ingest(path, kind, args))
+                _, peak, transient = asyncio.run(ingest(path, kind, args, trace=True))
+                print(
+                    f"{kind:<4} pages={stats['pages']:<5} chunks={stats['chunks']:<6} "
+                    f"{stats['pages_per_sec']:>8.1f} pages/s {stats['chunks_per_sec']:>9.1f} chunks/s "
+                    f"peak={peak / 1024:>8.0f}KiB transient={transient / 1024:>7.0f}KiB "
+                    f"file={os.path.getsize(path) / 1024:.0f}KiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Micro-benchmark: cost of the per-node latency instrumentation.
+
+Measures the wrapper added by ``instrument_node`` around a trivial node and
+compares a full chat-graph turn built with ``InstrumentedStateGraph`` against
+the same graph built from a plain ``StateGraph``.
+
+Usage:
+    python -m benchmarks.instrumentation_overhead --iterations 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from langgraph.graph import StateGraph  # noqa: E402
+
+from app.agents import graph as chat_graph  # noqa: E402
+from app.agents.instrumentation import instrument_node  # noqa: E402
+from app.agents.state import AgentState  # noqa: E402
+from app.core.registry import registry  # noqa: E402
+
+
+def noop(state):
+    return None
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn({})
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def build_plain_graph():
+    """The chat graph's topology with uninstrumented nodes."""
+    builder = StateGraph(AgentState)
+    for name, spec in chat_graph.graph.nodes.items():
+        action = spec.runnable.func or spec.runnable.afunc
+        builder.add_node(name, action.__wrapped__)
+    for source, target in chat_graph.graph.edges:
+        builder.add_edge(source, target)
+    for source, branches in chat_graph.graph.branches.items():
+        for branch in branches.values():
+            builder.add_conditional_edges(source, branch.path, branch.ends)
+    return builder.compile()
+
+
+async def per_turn_ms(compiled, iterations: int) -> float:
+    state = {"messages": [{"role": "user", "content": "please fetch the data"}]}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await compiled.ainvoke(state)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    raw = per_call_us(noop, args.iterations * 100)
+    wrapped = per_call_us(instrument_node("bench", "noop", noop), args.iterations * 100)
+    print(f"node call: raw={raw:.3f}us instrumented={wrapped:.3f}us overhead={wrapped - raw:.3f}us")
+
+    plain = asyncio.run(per_turn_ms(build_plain_graph(), args.iterations))
+    instrumented = asyncio.run(per_turn_ms(registry.get("chat_graph"), args.iterations))
+    print(
+        f"graph turn: plain={plain:.3f}ms instrumented={instrumented:.3f}ms "
+        f"overhead={(instrumented - plain) / plain * 100:.1f}%"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Micro-benchmark: intent routing over long messages and large rule sets.
+
+Compares the compiled ``IntentRouter`` (one regular expression for the
+whole table, every keyword in a shared prefix tree, scanned once per
+message) with the two linear approaches it
+replaces: substring ``in`` scans per keyword, which is what ``query_agent``
+used to do but cannot honour word boundaries, and one word-boundary regex
+per keyword, which is the correct reference. Each approach returns the set
+of intents that fire, so multi-intent detection is included in every
+timing, and is checked against the reference.
+
+Usage:
+    python -m benchmarks.intent_routing --intents 200 --keywords 10 --words 2000
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from app.agents.routing import Intent, IntentRouter  # noqa: E402
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def build_rules(rng: random.Random, intents: int, keywords: int):
+    return [
+        Intent(
+            name=f"intent{i}",
+            target=f"agent{i}",
+            agent=f"Agent{i}",
+            keywords=tuple(random_word(rng) for _ in range(keywords)),
+            priority=rng.randint(0, 100),
+        )
+        for i in range(intents)
+    ]
+
+
+def build_messages(rng: random.Random, rules, count: int, words: int, hits: int):
+    """Random prose with ``hits`` keywords from the rule set sprinkled in."""
+    vocabulary = [random_word(rng) for _ in range(5000)]
+    keywords = [keyword for intent in rules for keyword in intent.keywords]
+    messages = []
+    for _ in range(count):
+        tokens = rng.choices(vocabulary, k=words)
+        for _ in range(hits):
+            tokens[rng.randrange(words)] = rng.choice(keywords)
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def substring_scan(rules):
+    table = [(intent.name, [k.lower() for k in intent.keywords]) for intent in rules]
+
+    def match(text: str):
+        text = text.lower()
+        return {name for name, words in table if any(word in text for word in words)}
+
+    return match
+
+
+def regex_per_keyword(rules):
+    table = [
+        (intent.name, [re.compile(rf"\b{re.escape(k)}\b", re.IGNORECASE) for k in intent.keywords])
+        for intent in rules
+    ]
+
+    def match(text: str):
+        return {name for name, patterns in table if any(p.search(text) for p in patterns)}
+
+    return match
+
+
+def compiled_router(rules):
+    router = IntentRouter(rules)
+
+    def match(text: str):
+        return {intent.name for intent in router.match(text)}
+
+    return match
+
+
+def time_per_message(match, messages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            match(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--intents", type=int, default=200)
+    parser.add_argument("--keywords", type=int, default=10, help="keywords per intent")
+    parser.add_argument("--words", type=int, default=2000, help="words per message")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--hits", type=int, default=3, help="keywords planted per message")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = build_rules(rng, args.intents, args.keywords)
+    messages = build_messages(rng, rules, args.messages, args.words, args.hits)
+
+    start = time.perf_counter()
+    router = compiled_router(rules)
+    print(
+        f"{args.intents} intents x {args.keywords} keywords, {args.words} words/message; "
+        f"compile={(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+    reference = regex_per_keyword(rules)
+    expected = [reference(message) for message in messages]
+    for label, build in (
+        ("substring scan", substring_scan),
+        ("regex per keyword", regex_per_keyword),
+        ("compiled router", compiled_router),
+    ):
+        match = build(rules)
+        agrees = all(match(m) >= e for m, e in zip(messages, expected))
+        per_message = time_per_message(match, messages, args.repeat)
+        print(f"{label:<18} {per_message:>10.1f}us/message  finds-all-intents={agrees}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark: submit latency and drain rate of the background job runner.
+
+Submits ``--jobs`` workflow jobs through ``POST /jobs`` and times each
+submission, then lets a ``JobWorker`` drain the queue once per
+``--concurrency`` value and reports jobs per second. Each workflow makes up
+to three sequential stub LLM calls of ``--llm-latency`` seconds. The jobs
+table lives in a temporary SQLite file; SQLite ignores ``SKIP LOCKED``,
+which only matters with several workers, so one worker is used.
+
+Usage:
+    python -m benchmarks.jobs --jobs 200 --llm-latency 0.1 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models.models import Base, Job  # noqa: E402
+from app.services.job_service import job_service  # noqa: E402
+from app.services.job_worker import JobWorker  # noqa: E402
+from benchmarks._stubs import install_stubs  # noqa: E402
+
+
+async def submit(client: httpx.AsyncClient, count: int) -> list:
+    url = f"{settings.API_V1_STR}/jobs"
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = await client.post(
+            url, json={"kind": "workflow", "payload": {"topic": f"topic {i}"}}
+        )
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def drain(concurrency: int, count: int) -> float:
+    worker = JobWorker(concurrency=concurrency, poll_interval=0.05)
+    start = time.perf_counter()
+    worker.start()
+    while True:
+        await asyncio.sleep(0.05)
+        async with job_service.session_factory() as session:
+            done = (
+                await session.execute(
+                    select(func.count())
+                    .select_from(Job)
+                    .where(Job.status.in_(("succeeded", "failed")))
+                )
+            ).scalar_one()
+        if done >= count:
+            break
+    seconds = time.perf_counter() - start
+    await worker.close()
+    return seconds
+
+
+async def run(args: argparse.Namespace, path: str) -> None:
+    from main import app
+
+    install_stubs(llm_latency=args.llm_latency)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    job_service.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for concurrency in args.concurrency:
+                latencies = await submit(client, args.jobs)
+                seconds = await drain(concurrency, args.jobs)
+                cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+                print(
+                    f"concurrency={concurrency:<4} submit p50={cuts[49]:>6.2f} ms "
+                    f"p95={cuts[94]:>6.2f} ms  drained {args.jobs} jobs in {seconds:>6.2f}s "
+                    f"({args.jobs / seconds:>7.1f} jobs/s)"
+                )
+                async with job_service.session_factory() as session:
+                    await session.execute(delete(Job))
+                    await session.commit()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args, os.path.join(tmp, "jobs.sqlite")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Micro-benchmark: graph node invocations and latency per chat turn.
+
+Runs ``AgentService.process_message`` for a set of messages that exercise
+every routing decision and reports how many graph nodes executed per request
+together with the mean latency. Each turn should invoke the router and the
+response agent exactly once, plus one worker agent per detected intent (run
+in parallel) and a single join step whenever any worker ran.
+
+Usage:
+    python -m benchmarks.node_invocations --iterations 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+from app.services.agent_service import AgentService  # noqa: E402
+
+MESSAGES = {
+    "data": "Please fetch the latest sales data",
+    "analysis": "Can you analyze last quarter and give me a summary?",
+    "multi": "Fetch the sales data and give me a summary",
+    "unknown": "Hello there!",
+}
+
+
+async def run(iterations: int) -> None:
+    service = AgentService()
+
+    for label, message in MESSAGES.items():
+        node_counts = []
+        latencies = []
+        invocations = Counter()
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = await service.process_message(
+                user_message=message, thread_id="bench"
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            nodes = [node["node"] for node in response["metadata"]["nodes"]]
+            node_counts.append(len(nodes))
+            invocations.update(nodes)
+
+        per_node = ", ".join(
+            f"{node}={count / iterations:g}" for node, count in invocations.items()
+        )
+        print(
+            f"{label:<9} nodes/request={statistics.mean(node_counts):g} "
+            f"mean={statistics.mean(latencies):.3f}ms  [{per_node}]"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
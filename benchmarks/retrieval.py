@@ -0,0 +1,99 @@
+"""Benchmark: data_agent retrieval latency and vector memory per setting.
+
+Seeds an in-memory Qdrant with ``--chunks`` chunks for one user (and as many
+for a second user, to exercise the ``user_id`` filter), then times a
+multi-question search three ways: one Qdrant call per sub-query, one batched
+``query_batch_points`` call, and the batched call again with the query cache
+warm. In-process, batching only saves per-call overhead; against a
+server it also saves a network round trip per sub-query. Local mode searches exactly and ignores quantization, so RAM per vector
+is printed as an estimate for each ``QDRANT_QUANTIZATION`` setting with
+``QDRANT_ON_DISK`` enabled.
+
+Usage:
+    python -m benchmarks.retrieval --chunks 5000 --iterations 50
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import time
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from app.core.vectorstore import get_qdrant_client  # noqa: E402
+from app.services.ingestion_service import ingest_document  # noqa: E402
+from app.services.retrieval_service import RetrievalService, split_queries  # noqa: E402
+from benchmarks._stubs import install_stubs  # noqa: E402
+from benchmarks.ingestion import random_line  # noqa: E402
+
+QUESTION = (
+    "What were the sales figures for the northern region? "
+    "How did churn change last quarter? "
+    "Which products had the highest margin; and also who were the top customers"
+)
+
+
+async def seed(chunks: int, rng: random.Random) -> None:
+    # About ten generated lines per chunk at the default chunk size
+    for user_id in (1, 2):
+        text = "\n".join(random_line(rng) for _ in range(chunks * 10))
+        await ingest_document(
+            io.BytesIO(text.encode()), source=f"user{user_id}.txt", kind="text",
+            metadata={"user_id": user_id},
+        )
+
+
+async def timed(call, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+async def run(args: argparse.Namespace) -> None:
+    install_stubs(vector_size=args.vector_size)
+    await seed(args.chunks, random.Random(args.seed))
+    count = (await get_qdrant_client().count("documents")).count
+    queries = split_queries(QUESTION)
+    print(f"{count} points, {len(queries)} sub-queries, top_k={args.top_k}")
+
+    uncached = RetrievalService(top_k=args.top_k, cache_maxsize=0)
+    cached = RetrievalService(top_k=args.top_k)
+
+    async def sequential():
+        for query in queries:
+            await uncached.search([query], user_id=1)
+
+    async def batched():
+        await uncached.search(queries, user_id=1)
+
+    async def warm():
+        await cached.search(queries, user_id=1)
+
+    await warm()
+    for label, call in (("per sub-query", sequential), ("batched", batched), ("batched+cache", warm)):
+        print(f"{label:<14} {await timed(call, args.iterations):>9.3f}ms/search")
+
+    hits = await cached.search(queries, user_id=1)
+    print(f"hits only from user 1: {all(hit['source'] == 'user1.txt' for hit in hits)}")
+
+    d = args.vector_size
+    print(f"estimated RAM per {d}-d vector (originals on disk):")
+    for label, size in (("none", d * 4), ("scalar", d), ("binary", d / 8)):
+        print(f"  {label:<7} {size:>7.0f} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--vector-size", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Benchmark and self-check: streaming multipart uploads to S3.
+
+Runs ``stream_upload`` against an in-process S3 (moto) and checks the three
+things the multipart path is responsible for:
+
+* part sizing -- bodies below ``--part-size`` go up as a single PUT, larger
+  ones as ``ceil(size / part_size)`` parts, and the stored object matches
+  the reported size and SHA-256
+* checksums -- every part is sent with the SHA-256 of its own bytes, and
+  the object's composite checksum is the one those parts imply
+* abort-on-error -- a failing part or a body over ``max_size`` leaves no
+  object and no open multipart upload behind
+
+It then reports upload throughput per ``--concurrency`` value. moto answers
+instantly, so ``--part-latency`` adds a per-part delay to mimic the round
+trip to real S3. Exits non-zero if any check fails.
+
+Usage:
+    python -m benchmarks.s3_upload --size-mb 64 --part-latency 0.05 --concurrency 1 4 8
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import math
+import os
+import sys
+import time
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+# moto intercepts every call, but botocore still signs requests
+for _key in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+    os.environ.setdefault(_key, "bench")
+
+import boto3  # noqa: E402
+from fastapi import UploadFile  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from app.services.upload_service import UploadTooLarge, stream_upload  # noqa: E402
+
+BUCKET = "bench-uploads"
+MIB = 1024 * 1024
+
+
+class PartFailure(Exception):
+    """Raised by ``RecordingClient`` for the part it was told to fail."""
+
+
+class RecordingClient:
+    """S3 client proxy that records part checksums, delays parts and injects failures."""
+
+    def __init__(self, client, latency: float = 0.0, fail_part: int = 0):
+        self._client = client
+        self.latency = latency
+        self.fail_part = fail_part
+        self.parts = []
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def upload_part(self, **kwargs):
+        time.sleep(self.latency)
+        if kwargs["PartNumber"] == self.fail_part:
+            raise PartFailure(f"part {self.fail_part} failed")
+        self.parts.append((kwargs["PartNumber"], kwargs["Body"], kwargs["ChecksumSHA256"]))
+        return self._client.upload_part(**kwargs)
+
+
+def upload_file(data: bytes, declared_size: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=len(data) if declared_size else None)
+
+
+def leftovers(s3, key: str) -> list:
+    """Objects or unfinished multipart uploads left under ``key``."""
+    found = [
+        f"upload {upload['UploadId']}"
+        for upload in s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+        if upload["Key"] == key
+    ]
+    found += [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix=key).get("Contents", [])]
+    return found
+
+
+async def check_part_sizing(s3, part_size: int) -> list:
+    failures = []
+    for size in (1024, part_size - 1, part_size, 2 * part_size + 1, 5 * part_size):
+        data = os.urandom(size)
+        key = f"sizing/{size}"
+        client = RecordingClient(s3)
+        result = await stream_upload(
+            upload_file(data), key, s3_client=client, bucket=BUCKET, part_size=part_size
+        )
+        expected_parts = 1 if size < part_size else math.ceil(size / part_size)
+        stored = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+        if result["parts"] != expected_parts:
+            failures.append(f"{size} bytes: {result['parts']} parts, expected {expected_parts}")
+        if size >= part_size and any(len(body) != part_size for _, body, _ in sorted(client.parts)[:-1]):
+            failures.append(f"{size} bytes: a non-final part is not {part_size} bytes")
+        if stored != data or result["size"] != size:
+            failures.append(f"{size} bytes: stored object differs from the upload")
+        if result["sha256"] != hashlib.sha256(data).hexdigest():
+            failures.append(f"{size} bytes: reported SHA-256 is wrong")
+    return failures
+
+
+async def check_checksums(s3, part_size: int) -> list:
+    failures = []
+    client = RecordingClient(s3)
+    key = "checksums/object"
+    await stream_upload(
+        upload_file(os.urandom(3 * part_size)), key, s3_client=client, bucket=BUCKET,
+        part_size=part_size,
+    )
+    digests = b""
+    for number, body, checksum in sorted(client.parts):
+        digest = hashlib.sha256(body).digest()
+        digests += digest
+        if checksum != base64.b64encode(digest).decode():
+            failures.append(f"part {number}: sent checksum does not match its bytes")
+    composite = base64.b64encode(hashlib.sha256(digests).digest()).decode()
+    stored = s3.head_object(Bucket=BUCKET, Key=key, ChecksumMode="ENABLED").get("ChecksumSHA256")
+    if stored is None or stored.split("-")[0] != composite:
+        failures.append(f"composite checksum {stored!r}, expected {composite!r}")
+    return failures
+
+
+async def check_abort(s3, part_size: int) -> list:
+    failures = []
+    key = "abort/failed-part"
+    try:
+        await stream_upload(
+            upload_file(os.urandom(4 * part_size)), key,
+            s3_client=RecordingClient(s3, fail_part=3), bucket=BUCKET,
+            part_size=part_size, concurrency=2,
+        )
+        failures.append("failing part: upload reported success")
+    except PartFailure:
+        pass
+    if leftovers(s3, key):
+        failures.append(f"failing part: left {leftovers(s3, key)}")
+
+    # Size unknown up front, so the limit is only hit while streaming
+    key = "abort/too-large"
+    try:
+        await stream_upload(
+            upload_file(os.urandom(4 * part_size), declared_size=False), key,
+            s3_client=s3, bucket=BUCKET, part_size=part_size, max_size=2 * part_size,
+        )
+        failures.append("too large: upload reported success")
+    except UploadTooLarge:
+        pass
+    if leftovers(s3, key):
+        failures.append(f"too large: left {leftovers(s3, key)}")
+    return failures
+
+
+async def run(args: argparse.Namespace) -> int:
+    part_size = args.part_size_mb * MIB
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket=BUCKET)
+
+    failed = 0
+    for name, check in (
+        ("part sizing", check_part_sizing),
+        ("checksums", check_checksums),
+        ("abort on error", check_abort),
+    ):
+        failures = await check(s3, part_size)
+        failed += len(failures)
+        print(f"{name:<15} {'ok' if not failures else 'FAIL'}")
+        for failure in failures:
+            print(f"  {failure}")
+
+    data = os.urandom(args.size_mb * MIB)
+    for concurrency in args.concurrency:
+        client = RecordingClient(s3, latency=args.part_latency)
+        result = await stream_upload(
+            upload_file(data), "throughput/object", s3_client=client, bucket=BUCKET,
+            part_size=part_size, concurrency=concurrency,
+        )
+        print(
+            f"concurrency={concurrency:<3} {args.size_mb} MiB in {result['parts']} parts "
+            f"{result['seconds']:>7.3f}s ({result['throughput_mbps']:>8.1f} MB/s)"
+        )
+    return failed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--part-size-mb", type=int, default=5)
+    parser.add_argument("--part-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with mock_aws():
+        failed = asyncio.run(run(args))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
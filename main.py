@@ -1,7 +1,13 @@
 from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, AsyncExitStack
 from app.core.config import settings
-from app.api import chat
+from app.api import chat, files, jobs, monitoring, share, threads
+from app.core.database import async_engine
+from app.agents.checkpointer import open_checkpointer
+from app.services.message_writer import message_writer
+from app.core.registry import registry
+from app.core.logger import logger, shutdown_logging, start_logging
+from app.core.metrics import MetricsMiddleware
 
 app = FastAPI()
 
@@ -9,14 +15,45 @@ app = FastAPI()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("\n\nStarting app...\n\n")
-    yield
-    print("\n\nShutting down app...\n\n")
+    start_logging()
+    async with AsyncExitStack() as stack:
+        if settings.CHECKPOINTER_ENABLED:
+            await stack.enter_async_context(open_checkpointer())
+        registry.warm(settings.WARM_COMPONENTS)
+        logger.info("Startup components", extra={"components": registry.report()})
+        message_writer.start()
+        job_worker = None
+        if settings.JOB_WORKER_ENABLED:
+            from app.services.job_worker import JobWorker
+
+            job_worker = JobWorker()
+            job_worker.start()
+        yield
+        print("\n\nShutting down app...\n\n")
+        if job_worker is not None:
+            await job_worker.close()
+        await message_writer.close()
+    await async_engine.dispose()
+    shutdown_logging()
 
 
 app = FastAPI(tittle=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(chat.router, prefix=f"{settings.API_V1_STR}/chat", tags=["Chat"])
+app.include_router(
+    threads.router, prefix=f"{settings.API_V1_STR}/threads", tags=["Threads"]
+)
+app.include_router(files.router, prefix=f"{settings.API_V1_STR}/files", tags=["Files"])
+app.include_router(jobs.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["Jobs"])
+app.include_router(share.router, prefix=f"{settings.API_V1_STR}/share", tags=["Share"])
+app.include_router(
+    monitoring.router,
+    prefix=f"{settings.API_V1_STR}/monitoring",
+    tags=["Monitoring"],
+)
+app.include_router(monitoring.metrics_router, tags=["Monitoring"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+import unittest
+
+from benchmarks import _settings  # noqa: F401  (must run before app imports)
+
+from app.agents.routing import Intent, IntentRouter  # noqa: E402
+
+INTENTS = (
+    Intent(name="phrase", target="a", agent="A", keywords=("look up",), priority=10),
+    Intent(name="word", target="b", agent="B", keywords=("look", "find")),
+    Intent(name="pattern", target="c", agent="C", patterns=(r"look\w*",), priority=5),
+)
+
+
+class CountingRegex:
+    """Stands in for the router's compiled expression and counts scans."""
+
+    def __init__(self, regex):
+        self.regex = regex
+        self.scans = 0
+
+    def finditer(self, text):
+        self.scans += 1
+        return self.regex.finditer(text)
+
+    def search(self, text):
+        self.scans += 1
+        return self.regex.search(text)
+
+
+class IntentRouterTest(unittest.TestCase):
+    def test_scans_message_once_for_every_intent(self):
+        router = IntentRouter(INTENTS)
+        counting = CountingRegex(router._regex)
+        router._regex = counting
+
+        found = router.match("Could you LOOK UP the order and find lookups?")
+
+        self.assertEqual(counting.scans, 1)
+        self.assertEqual([intent.name for intent in found], ["phrase", "pattern", "word"])
+
+    def test_overlapping_keywords_all_fire(self):
+        router = IntentRouter(INTENTS)
+
+        self.assertEqual(
+            {intent.name for intent in router.match("look up")}, {"phrase", "word", "pattern"}
+        )
+        self.assertEqual({intent.name for intent in router.match("lookups")}, {"pattern"})
+        self.assertEqual(router.match("overlooked"), [])
+
+    def test_ties_go_to_first_mention(self):
+        router = IntentRouter(
+            [
+                Intent(name="first", target="a", agent="A", keywords=("alpha",)),
+                Intent(name="second", target="b", agent="B", patterns=(r"beta\w*",)),
+            ]
+        )
+
+        self.assertEqual([i.name for i in router.match("betas then alpha")], ["second", "first"])
+
+    def test_empty_table_matches_nothing(self):
+        self.assertEqual(IntentRouter([]).match("anything"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Standalone job worker: drains the jobs table outside the API process.
+
+Run one or more of these next to the API so long agent runs scale apart
+from HTTP traffic:
+
+    python worker.py
+
+Stops on SIGINT/SIGTERM, giving running jobs ``JOB_SHUTDOWN_GRACE`` seconds
+to finish and handing the rest back to the queue.
+"""
+
+import asyncio
+import signal
+from contextlib import AsyncExitStack
+
+from app.agents.checkpointer import open_checkpointer
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.logger import logger, shutdown_logging, start_logging
+from app.core.registry import registry
+from app.services.job_worker import JobWorker
+from app.services.message_writer import message_writer
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    start_logging()
+    async with AsyncExitStack() as stack:
+        if settings.CHECKPOINTER_ENABLED:
+            await stack.enter_async_context(open_checkpointer())
+        registry.warm(settings.WARM_COMPONENTS)
+        message_writer.start()
+        worker = JobWorker()
+        worker.start()
+        logger.info(
+            "Job worker started",
+            extra={"worker_id": worker.worker_id, "concurrency": worker.concurrency},
+        )
+        await stop.wait()
+        logger.info("Job worker stopping", extra={"worker_id": worker.worker_id})
+        await worker.close()
+        await message_writer.close()
+    await async_engine.dispose()
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())